@@ -1,281 +1,224 @@
-import os
 import sys
-import comtypes.client
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTextEdit, QFileDialog, QApplication, QLineEdit, QTableView
-from PyQt5.QtCore import QAbstractTableModel, Qt
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTextEdit, QFileDialog, QApplication, QLineEdit, QTableView, QComboBox, QCheckBox
+from PyQt5.QtCore import QAbstractTableModel, Qt, QObject, QThread, QMetaObject, QTimer, pyqtSignal, pyqtSlot
+from etabs_results import EtabsModel, ExtractionCancelled, is_number, drift_results_table, torsion_results_table, \
+    drift_envelope_table, torsion_envelope_table, DriftLimits, parse_limits
+from results_export import export_results
+from etabs_pool import EtabsInstancePool
+from stage_timer import StageTimer
 
 
 
 class pandasModel(QAbstractTableModel):
     # create pandas model class to display dataframe in QTableView
     # https://learndataanalysis.org/display-pandas-dataframe-with-pyqt5-qtableview-widget/
+    # columns are kept as numpy arrays, rows are added to the view in chunks as it scrolls
+    # and the formatted text of recently shown rows is cached
+    chunkSize = 2000  # rows added to the view per fetchMore
+    cacheSize = 5000  # rows of formatted text kept
 
     def __init__(self, data):
         QAbstractTableModel.__init__(self)
         self._data = data
+        self._headers = [str(col) for col in data.columns]
+        self._columns = [np.asarray(data[col]) for col in data.columns]
+        self._rows = None  # positions of rows passing the filter, None for all rows
+        self._sortColumn = None
+        self._sortOrder = Qt.AscendingOrder
+        self._order = np.arange(data.shape[0])  # data row position shown at each view row
+        self._loaded = min(self.chunkSize, len(self._order))
+        self._text = OrderedDict()
 
     def rowCount(self, parent=None):
-        return self._data.shape[0]
+        return self._loaded
 
     def columnCount(self, parent=None):
-        return self._data.shape[1]
+        return len(self._columns)
 
     def data(self, index, role=Qt.DisplayRole):
         if index.isValid():
             if role == Qt.DisplayRole:
-                return str(self._data.iloc[index.row(), index.column()])
+                return self.rowText(index.row())[index.column()]
         return None
 
+    def rowText(self, row):
+        # formatted text of a view row, from the cache if it was shown recently
+        text = self._text.get(row)
+        if text is None:
+            position = self._order[row]
+            text = [str(column[position]) for column in self._columns]
+            self._text[row] = text
+            if len(self._text) > self.cacheSize:
+                self._text.popitem(last=False)
+        else:
+            self._text.move_to_end(row)
+        return text
+
     def headerData(self, col, orientation, role):
         if orientation == Qt.Horizontal and role == Qt.DisplayRole:
-            return self._data.columns[col]
+            return self._headers[col]
         return None
 
+    def canFetchMore(self, parent):
+        return self._loaded < len(self._order)
+
+    def fetchMore(self, parent):
+        # add the next chunk of rows to the view
+        count = min(self.chunkSize, len(self._order) - self._loaded)
+        self.beginInsertRows(parent, self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # sort by reordering row positions, the dataframe itself is not changed
+        self.layoutAboutToBeChanged.emit()
+        self._sortColumn = column if column >= 0 else None
+        self._sortOrder = order
+        self._order = self.arrangeRows()
+        self._text.clear()
+        self.layoutChanged.emit()
+
+    def setRowFilter(self, rows):
+        # show only the data row positions given, or all rows if rows is None
+        self.beginResetModel()
+        self._rows = None if rows is None else np.asarray(rows, dtype=np.int64)
+        self._order = self.arrangeRows()
+        self._loaded = min(self.chunkSize, len(self._order))
+        self._text.clear()
+        self.endResetModel()
+
+    def setLabelFilter(self, labels):
+        # show only rows with the dataframe index labels given, in table order, or all rows if labels is None
+        if labels is None:
+            self.setRowFilter(None)
+            return
+        rows = self._data.index.get_indexer(labels)
+        self.setRowFilter(np.sort(rows[rows >= 0]))
+
+    def arrangeRows(self):
+        # data row positions in view order after filtering and sorting
+        rows = np.arange(self._data.shape[0]) if self._rows is None else self._rows
+        if self._sortColumn is None:
+            return rows
+        keys = self._columns[self._sortColumn][rows]
+        if keys.dtype == object:
+            keys = keys.astype(str)
+        order = rows[np.argsort(keys, kind='stable')]
+        if self._sortOrder == Qt.DescendingOrder:
+            order = order[::-1]
+        return order
 
-def is_number(s):
-    # funtion to test if a string input is a number
-    # https://stackoverflow.com/questions/354038/how-do-i-check-if-a-string-is-a-number-float
-    try:
-        float(s)
-        return True
-    except ValueError:
-        return False
-
-class EtabsModel:
-    # my ETABS API class to open and manipulate etabs model
-    def __init__(self, modelpath, etabspath="C:/Program Files/Computers and Structures/ETABS 17/ETABS.exe", existinstance=False, specprogpath=False):
-        # set the following flag to True to attach to an existing instance of the program
-        # otherwise a new instance of the program will be started
-        self.AttachToInstance = existinstance
-
-        # set the following flag to True to manually specify the path to ETABS.exe
-        # this allows for a connection to a version of ETABS other than the latest installation
-        # otherwise the latest installed version of ETABS will be launched
-        self.SpecifyPath = specprogpath
-
-        # if the above flag is set to True, specify the path to ETABS below
-        self.ProgramPath = etabspath
-
-        # full path to the model
-        # set it to the desired path of your model
-        self.FullPath = modelpath
-        [self.modelPath, self.modelName] = os.path.split(self.FullPath)
-        if not os.path.exists(self.modelPath):
-            try:
-                os.makedirs(self.modelPath)
-            except OSError:
-                pass
-
-        if self.AttachToInstance:
-            # attach to a running instance of ETABS
-            try:
-                # get the active ETABS object
-                self.myETABSObject = comtypes.client.GetActiveObject("CSI.ETABS.API.ETABSObject")
-                self.success = True
-            except (OSError, comtypes.COMError):
-                print("No running instance of the program found or failed to attach.")
-                self.success = False
-                sys.exit(-1)
-
-        else:
-            # create API helper object
-            self.helper = comtypes.client.CreateObject('ETABSv17.Helper')
-            self.helper = self.helper.QueryInterface(comtypes.gen.ETABSv17.cHelper)
-            if self.SpecifyPath:
-                try:
-                    # 'create an instance of the ETABS object from the specified path
-                    self.myETABSObject = self.helper.CreateObject(self.ProgramPath)
-                except (OSError, comtypes.COMError):
-                    print("Cannot start a new instance of the program from " + self.ProgramPath)
-                    sys.exit(-1)
-            else:
-
-                try:
-                    # create an instance of the ETABS object from the latest installed ETABS
-                    self.myETABSObject = self.helper.CreateObjectProgID("CSI.ETABS.API.ETABSObject")
-                except (OSError, comtypes.COMError):
-                    print("Cannot start a new instance of the program.")
-                    sys.exit(-1)
-
-            # start ETABS application
-            self.myETABSObject.ApplicationStart()
-
-        # create SapModel object
-        self.SapModel = self.myETABSObject.SapModel
-
-        # initialize model
-        self.SapModel.InitializeNewModel()
-
-        # create new blank model
-        # ret = self.SapModel.File.NewBlank()
-
-        # open existing model
-        ret = self.SapModel.File.OpenFile(self.FullPath)
-
-        """
-        # save model
-        print(self.FullPath)
-        ret = self.SapModel.File.Save(self.FullPath)
-        print(ret)
-        print("ETABS mod - model saved")
-        """
-
-        # run model (this will create the analysis model)
-        ret = self.SapModel.Analyze.RunAnalysis()
-
-        # get all load combination names
-        self.NumberCombo = 0
-        self.ComboNames = []
-        [self.NumberCombo, self.ComboNames, ret] = self.SapModel.RespCombo.GetNameList(self.NumberCombo, self.ComboNames)
-
-        # isolate drift combos by searching for "drift" in combo name
-        self.DriftCombos = []
-        for combo in self.ComboNames:
-            lowerCombo = combo.lower()
-            # skip combinations without drift in name
-            if "drift" not in lowerCombo:
-                continue
-            self.DriftCombos.append(combo)
-
-        self.StoryDrifts = []
-        self.JointDisplacements = []
-        pd.set_option("max_columns", 8)
-        # pd.set_option("precision", 4)
-
-    def story_drift_results(self, dlimit=0.01):
-        # returns dataframe drift results for all drift load combinations
-        self.StoryDrifts = []
-        for dcombo in self.DriftCombos:
-            # deselect all combos and cases, then only display results for combo passed
-            ret = self.SapModel.Results.Setup.DeselectAllCasesAndCombosForOutput()
-            ret = self.SapModel.Results.Setup.SetComboSelectedForOutput(dcombo)
-
-            # initialize drift results
-            NumberResults = 0
-            Stories = []
-            LoadCases = []
-            StepTypes = []
-            StepNums = []
-            Directions = []
-            Drifts = []
-            Labels = []
-            Xs = []
-            Ys = []
-            Zs = []
-
-            [NumberResults, Stories, LoadCases, StepTypes, StepNums, Directions, Drifts, Labels, Xs, Ys, Zs, ret] = \
-                self.SapModel.Results.StoryDrifts(NumberResults, Stories, LoadCases, StepTypes, StepNums, Directions,
-                                                  Drifts, Labels, Xs, Ys, Zs)
-            # append all drift results to storydrifts list
-            for i in range(0, NumberResults):
-                self.StoryDrifts.append((Stories[i], LoadCases[i], Directions[i], Drifts[i], Drifts[i] / dlimit))
-
-        # set up pandas data frame and sort by drift column
-        labels = ['Story', 'Combo', 'Direction', 'Drift', 'DCR(Drift/Limit)']
-        df = pd.DataFrame.from_records(self.StoryDrifts, columns=labels)
-        dfSort = df.sort_values(by=['Drift'], ascending=False)
-        dfSort.Drift = dfSort.Drift.round(4)
-        dfSort['DCR(Drift/Limit)'] = dfSort['DCR(Drift/Limit)'].round(2)
-        return dfSort
-
-    def story_torsion_check(self):
-        # returns dataframe of torsion results for drift combinations
-        self.JointDisplacements = []
-        for dcombo in self.DriftCombos:
-            # deselect all combos and cases, then only display results for combo passed
-            ret = self.SapModel.Results.Setup.DeselectAllCasesAndCombosForOutput()
-            ret = self.SapModel.Results.Setup.SetComboSelectedForOutput(dcombo)
-
-            # initialize joint drift results
-            NumberResults = 0
-            Stories = []
-            LoadCases = []
-            Label  = ''
-            Names = ''
-            StepType = []
-            StepNum = []
-            # Directions = []
-            DispX = []
-            DispY = []
-            DriftX = []
-            DriftY = []
-
-            [NumberResults, Stories, Label, Names, LoadCases, StepType, StepNum, DispX, DispY, DriftX, DriftY, ret] = \
-                self.SapModel.Results.JointDrifts(NumberResults, Stories, Label, Names, LoadCases, StepType, StepNum,
-                                                  DispX, DispY, DriftX, DriftY)
-
-            # append all displacement results to jointdrift list
-            for i in range(0, NumberResults):
-                self.JointDisplacements.append((Label[i], Stories[i], LoadCases[i], DispX[i], DispY[i]))
-
-        # set up pandas data frame and sort by drift column
-        jlabels = ['label', 'Story', 'Combo', 'DispX', 'DispY']
-        jdf = pd.DataFrame.from_records(self.JointDisplacements, columns=jlabels)
-        story_names = jdf.Story.unique()
-        # print("story names = " + str(story_names))
-
-        # set up data frame for torsion displacement results
-        tlabels = ['Story', 'Load Combo', 'Direction', 'Max Displ', 'Avg Displ', 'Ratio']
-        tdf = pd.DataFrame(columns=tlabels)
-
-        # calculate and append to df the max, avg, and ratio of story displacements in each dir.
-        for dcombo in self.DriftCombos:
-            for story in story_names:
-                temp_df = jdf[(jdf['Story'] == story) & (jdf['Combo'] == dcombo)]
-                # assume direction is X
-                direction = 'X'
-                averaged = abs(temp_df['DispX'].mean())
-                maximumd = temp_df['DispX'].abs().max()
-                averagey = abs(temp_df['DispY'].mean())
-
-                # change direction to Y if avg y-dir displacement is higher
-                if averagey > averaged:
-                    averaged = averagey
-                    maximumd = temp_df['DispY'].abs().max()
-                    direction = 'Y'
-
-                ratiod = maximumd / averaged
-
-                # append info to torsion dataframe
-                temp_df2 = pd.DataFrame([[story, dcombo, direction, maximumd, averaged, ratiod]], columns=tlabels)
-                tdf = tdf.append(temp_df2, ignore_index=True)
-
-        tdfSort = tdf.sort_values(by=['Ratio'], ascending=False)
-        tdfSort.Ratio = tdfSort.Ratio.round(3)
-        tdfSort['Max Displ'] = tdfSort['Max Displ'].round(3)
-        tdfSort['Avg Displ'] = tdfSort['Avg Displ'].round(3)
-
-        return tdfSort
-
-    def model_close(self):
-        # close the program
-        ret = self.myETABSObject.ApplicationExit(False)
-        self.SapModel = None
-        self.myETABSObject = None
-        return 'model closed'
-
-"""
-# define drift limit for DCR calc
-DriftLimit = 0.01
-FilePath = "C:\\Users\\Andrew-V.Young\\Desktop\\ETABS API TEST\\ETABS\\TestModel.EDB"
-
-testModel = EtabsModel(FilePath)
-drifts = testModel.story_drift_results(DriftLimit)
-torsion = testModel.story_torsion_check()
-print(drifts.head(10))
-print("\n\n")
-print(torsion)
-
-ret = testModel.model_close()
-print(ret)
-"""
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # ##############################################################################################################
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class ModelWorker(QObject):
+    # owns the ETABS model on a worker thread so opening, analysis and extraction don't freeze the window
+    # slots are run through queued signals from get_model_dialog and results are sent back as signals
+    progress = pyqtSignal(str)
+    opened = pyqtSignal(object)
+    driftReady = pyqtSignal(object)
+    torsionReady = pyqtSignal(object)
+    closed = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self):
+        super(ModelWorker, self).__init__()
+        self.model = None
+        self.cancelRequested = False
+        self.pool = None
+        self.poolTimer = None
+
+    def cancel(self):
+        # called from the window thread, stops the running job at its next progress step
+        self.cancelRequested = True
+
+    def report(self, message):
+        # progress function given to EtabsModel, raises to stop extraction if cancel was requested
+        if self.cancelRequested:
+            raise ExtractionCancelled()
+        self.progress.emit(message)
+
+    @pyqtSlot()
+    def startCom(self):
+        # the model is created and used only on this thread, so COM is initialized here
+        import comtypes
+        comtypes.CoInitialize()
+
+        # ETABS is kept running between models, and exited after it has been idle for ten minutes
+        self.pool = EtabsInstancePool(maxsize=1, idletimeout=600.0)
+        self.poolTimer = QTimer()
+        self.poolTimer.timeout.connect(self.pool.evict_idle)
+        self.poolTimer.start(60000)
+
+    @pyqtSlot(str)
+    def openModel(self, fileName):
+        # opening and analysis are single ETABS calls, a cancel request closes the model once they finish
+        try:
+            self.model = EtabsModel(fileName, progress=self.progress.emit, pool=self.pool, timer=StageTimer())
+        except (Exception, SystemExit) as e:
+            self.failed.emit("model could not be opened: %s" % e)
+            return
+        if self.cancelRequested:
+            self.model.model_close()
+            self.model = None
+            self.failed.emit("model open cancelled")
+            return
+        self.model.Progress = self.report
+        self.opened.emit(self.model)
+
+    @pyqtSlot(object, int, str, bool, bool)
+    def checkDrift(self, dlimit, top, per, incremental, envelope):
+        # top of 0 returns all rows, per of '' picks top rows overall
+        self.runCheck("drift check", lambda: self.model.story_drift_results(dlimit, top, per or None, incremental,
+                                                                          envelope),
+                      self.driftReady)
+
+    @pyqtSlot(int, str, bool, bool)
+    def checkTorsion(self, top, per, incremental, envelope):
+        self.runCheck("torsion check", lambda: self.model.story_torsion_check(top, per or None, incremental, envelope),
+                      self.torsionReady)
+
+    def runCheck(self, name, check, readySignal):
+        # run results check and send the table back, or a message if it was cancelled or failed
+        try:
+            table = check()
+        except ExtractionCancelled:
+            self.failed.emit(name + " cancelled")
+            return
+        except Exception as e:
+            self.failed.emit("%s failed: %s" % (name, e))
+            return
+        readySignal.emit(table)
+
+    @pyqtSlot()
+    def closeModel(self):
+        close_mess = "nothing found to close"
+        if self.model:
+            close_mess = self.model.model_close()
+        self.model = None
+        self.closed.emit(close_mess)
+
+    @pyqtSlot()
+    def shutdown(self):
+        # close the model and exit the ETABS programs kept in the pool
+        self.closeModel()
+        if self.pool is not None:
+            self.poolTimer.stop()
+            self.pool.close()
+
+
 class get_model_dialog(QWidget):
     # main widget for user interface
+    # long running model work is requested from the worker thread with these signals
+    requestOpen = pyqtSignal(str)
+    requestDrift = pyqtSignal(object, int, str, bool, bool)
+    requestTorsion = pyqtSignal(int, str, bool, bool)
+    requestClose = pyqtSignal()
+
     def __init__(self, parent=None):
         super(get_model_dialog, self).__init__(parent)
         self.initUI()
@@ -286,6 +229,56 @@ class get_model_dialog(QWidget):
         self.modelPath = None
         self.driftTable = pd.DataFrame()
         self.torsTable = pd.DataFrame()
+        self.driftModel = None
+        self.torsModel = None
+        self.driftCompare = False
+        self.driftEnvelope = False
+        self.torsEnvelope = False
+        self.pendingJobs = 0
+        self.startWorker()
+
+    def startWorker(self):
+        # set up worker thread that owns the ETABS model and connect requests and results
+        self.workerThread = QThread()
+        self.worker = ModelWorker()
+        self.worker.moveToThread(self.workerThread)
+        self.workerThread.started.connect(self.worker.startCom)
+
+        self.requestOpen.connect(self.worker.openModel)
+        self.requestDrift.connect(self.worker.checkDrift)
+        self.requestTorsion.connect(self.worker.checkTorsion)
+        self.requestClose.connect(self.worker.closeModel)
+
+        self.worker.progress.connect(self.showProgress)
+        self.worker.opened.connect(self.modelOpened)
+        self.worker.driftReady.connect(self.showDrift)
+        self.worker.torsionReady.connect(self.showTorsion)
+        self.worker.closed.connect(self.modelClosed)
+        self.worker.failed.connect(self.jobFailed)
+        self.workerThread.start()
+
+    def request(self, signal, *args):
+        # send request to the worker and disable buttons until it is answered
+        self.worker.cancelRequested = False
+        self.pendingJobs += 1
+        self.updateButtons()
+        signal.emit(*args)
+
+    def finishJob(self):
+        self.pendingJobs -= 1
+        self.updateButtons()
+
+    def updateButtons(self):
+        # buttons are only enabled when the worker is idle, model buttons only if a model is open
+        idle = self.pendingJobs == 0
+        hasModel = idle and self.chosenModel is not None
+        self.btn1.setEnabled(idle)
+        self.btn2.setEnabled(hasModel)
+        self.btn3.setEnabled(hasModel)
+        self.btn4.setEnabled(hasModel)
+        self.btn5.setEnabled(hasModel)
+        self.btn7.setEnabled(not idle)
+        self.btn8.setEnabled(hasModel)
 
     def initUI(self):
 
@@ -316,6 +309,44 @@ class get_model_dialog(QWidget):
         self.layout.addWidget(self.statustext)
         self.layout.addStretch(1)
 
+        # add text input and choice to show only the top governing results, blank shows all results
+        self.hboxshown = QHBoxLayout()
+        self.leshown = QLabel("Governing results shown:")
+        self.hboxshown.addWidget(self.leshown)
+        self.topText = QLineEdit()
+        self.topText.setMaxLength(7)
+        self.topText.setPlaceholderText("all")
+        self.hboxshown.addWidget(self.topText)
+        self.perBox = QComboBox()
+        self.perBox.addItem("overall", "")
+        self.perBox.addItem("per direction", "Direction")
+        self.perBox.addItem("per story", "Story")
+        self.hboxshown.addWidget(self.perBox)
+
+        # option to re-check after design changes and compare with the previous results
+        self.compareBox = QCheckBox("Compare with previous check")
+        self.hboxshown.addWidget(self.compareBox)
+
+        # option to show only the governing combo of each story and direction
+        self.envelopeBox = QCheckBox("Envelope per story")
+        self.hboxshown.addWidget(self.envelopeBox)
+        self.hboxshown.addStretch(1)
+        self.layout.addLayout(self.hboxshown)
+
+        # filter pane, shown rows are looked up in the result index of the model
+        self.hboxfilter = QHBoxLayout()
+        self.hboxfilter.addWidget(QLabel("Filter:"))
+        self.storyFilter = QComboBox()
+        self.comboFilter = QComboBox()
+        self.directionFilter = QComboBox()
+        for box, allText in ((self.storyFilter, "all stories"), (self.comboFilter, "all combos"),
+                             (self.directionFilter, "all directions")):
+            box.addItem(allText, None)
+            box.currentIndexChanged.connect(lambda index: self.applyFilters())
+            self.hboxfilter.addWidget(box)
+        self.hboxfilter.addStretch(1)
+        self.layout.addLayout(self.hboxfilter)
+
         self.vboxdrift = QVBoxLayout()
         self.vboxtors = QVBoxLayout()
         self.hboxresults = QHBoxLayout()
@@ -333,6 +364,14 @@ class get_model_dialog(QWidget):
         self.limitText.setText(str(inputLimit))
         self.hboxlimit.addWidget(self.limitText)
 
+        # add a text input for story drift limits that differ from the drift limit
+        self.lestory = QLabel()
+        self.lestory.setText("Story Limits:")
+        self.hboxlimit.addWidget(self.lestory)
+        self.storyLimitText = QLineEdit()
+        self.storyLimitText.setPlaceholderText("Story1=0.015, Roof=0.02")
+        self.hboxlimit.addWidget(self.storyLimitText)
+
 
         # add a button to check drift
         self.btn2 = QPushButton("Check Drift Results")
@@ -343,6 +382,7 @@ class get_model_dialog(QWidget):
 
         # table view to show drift results
         self.driftview = QTableView()
+        self.driftview.setSortingEnabled(True)
         self.vboxdrift.addWidget(self.driftview)
 
         # add a button to check torsion
@@ -355,6 +395,7 @@ class get_model_dialog(QWidget):
 
         # table view to show torsion check
         self.torsview = QTableView()
+        self.torsview.setSortingEnabled(True)
         self.vboxtors.addWidget(self.torsview)
 
         # put drift and torsion results together and into main layout
@@ -366,19 +407,42 @@ class get_model_dialog(QWidget):
         self.vboxbot.addStretch(1)
         self.hboxbot = QHBoxLayout()
 
-        # button to save results to excel file
+        # button to save results to parquet or feather files and an excel summary
         self.btn5 = QPushButton("Save Results")
         self.btn5.clicked.connect(lambda: self.saveResults())
         self.btn5.setEnabled(False)
         self.hboxbot.addWidget(self.btn5)
+        self.formatBox = QComboBox()
+        self.formatBox.addItem("parquet", "parquet")
+        self.formatBox.addItem("feather", "feather")
+        self.formatBox.addItem("excel only", None)
+        self.hboxbot.addWidget(self.formatBox)
+        self.summaryBox = QCheckBox("Excel summary of governing rows")
+        self.summaryBox.setChecked(True)
+        self.hboxbot.addWidget(self.summaryBox)
+        # excel only saves every row, so there is no summary to choose
+        self.formatBox.currentIndexChanged.connect(
+            lambda i: self.summaryBox.setEnabled(self.formatBox.currentData() is not None))
         self.hboxbot.addStretch(1)
 
+        # button to show time spent in each stage of the checks
+        self.btn8 = QPushButton("Timing Report")
+        self.btn8.clicked.connect(lambda: self.showTiming())
+        self.btn8.setEnabled(False)
+        self.hboxbot.addWidget(self.btn8)
+
         # button to close model
         self.btn3 = QPushButton("Close ETABS Model")
         self.btn3.clicked.connect(lambda: self.closeModel())
         self.btn3.setEnabled(False)
         self.hboxbot.addWidget(self.btn3)
 
+        # button to cancel running model job
+        self.btn7 = QPushButton("Cancel")
+        self.btn7.clicked.connect(lambda: self.worker.cancel())
+        self.btn7.setEnabled(False)
+        self.hboxbot.addWidget(self.btn7)
+
         self.vboxbot.addLayout(self.hboxbot)
         self.layout.addLayout(self.vboxbot)
 
@@ -394,24 +458,37 @@ class get_model_dialog(QWidget):
         dlg.setNameFilters(["ETABS Models (*.EDB)", "Backup Models (*.ebk *.$et)"])
         dlg.selectNameFilter("ETABS Models (*.EDB)")
 
+        fileName = None
         if dlg.exec():
             fileNames = dlg.selectedFiles()
             fileName = fileNames[0]
 
         # run reformatting if file chosen, otherwise no action
         if fileName:
-            self.mess1 = "Selected File: \n %s \n\n" % fileName
-            self.chosenModel = EtabsModel(fileName)
-            self.modelPath = self.chosenModel.modelPath
-            self.statustext.setText(self.mess1)
-            self.btn2.setEnabled(True)
-            self.btn3.setEnabled(True)
-            self.btn4.setEnabled(True)
-            self.btn5.setEnabled(True)
+            self.mess1 = "Selected File: \n %s \n" % fileName
+            self.mess_drift = ''
+            self.mess_tors = ''
+            self.request(self.requestOpen, fileName)
         else:
             not_opened = "No file was opened"
             self.statustext.setText(not_opened)
 
+    def modelOpened(self, model):
+        # called when the worker has opened and analyzed the model
+        self.chosenModel = model
+        self.mess1 += "model opened in %.1f s, analysis run in %.1f s \n\n" % (self.chosenModel.OpenTime,
+                                                                             self.chosenModel.AnalysisTime)
+        self.modelPath = self.chosenModel.modelPath
+        self.statustext.setText(self.mess1)
+        self.finishJob()
+
+    def showProgress(self, message):
+        self.statustext.setText(self.mess1 + self.mess_drift + self.mess_tors + message)
+
+    def jobFailed(self, message):
+        self.statustext.setText(self.mess1 + self.mess_drift + self.mess_tors + message)
+        self.finishJob()
+
     def activemodel(self):
         # function to open active model - NOT WORKING YET
         self.chosenModel = EtabsModel(existinstance=True)
@@ -419,72 +496,205 @@ class get_model_dialog(QWidget):
         self.mess1 = "Selected open model: \n %s \n\n" % self.chosenModel.modelName
         self.statustext.setText(self.mess1)
 
+    def shownResults(self):
+        # number of top governing results to show (0 for all) and the grouping they are picked in
+        currentTop = self.topText.text().strip()
+        if not currentTop:
+            return 0, self.perBox.currentData()
+        if not currentTop.isdigit():
+            return None, None
+        return int(currentTop), self.perBox.currentData()
+
     def getdrift(self, dlimit):
         # function that populates drift results table
         currentLimit = self.limitText.text()  # read text input
         is_lim_num = is_number(currentLimit)  # check if input is a number
+        top, per = self.shownResults()
 
-        if is_lim_num:
+        if top is None:
+            self.statustext.setText("Please input a whole number of results to show or leave it blank")
+        elif is_lim_num:
             numberLimit = float(currentLimit)  # make input a number
-            self.driftTable = self.chosenModel.story_drift_results(numberLimit)  # get drift results as dataframe
-            self.mess_drift = "showing drift results for limit " + currentLimit + "\n"
-            self.statustext.setText(self.mess1 + self.mess_drift + self.mess_tors)
-            driftModel = pandasModel(self.driftTable)  # transform dataframe to use in QTableView
-            self.driftview.setModel(driftModel)  # populate QTableView with drift results
-
-            wmin = self.driftview.verticalHeader().width() + 24
-            for i in range(driftModel.columnCount()):
-                wmin += self.driftview.columnWidth(i)
-            self.driftview.setMinimumWidth(wmin)
-            # self.driftview.resize(800, 600)
-            # https: // stackoverflow.com / questions / 41542934 / pyqt - qtablewidget - remove - scrollbar - to - show - full - table
+            try:
+                storyLimits = parse_limits(self.storyLimitText.text())
+            except ValueError as e:
+                self.statustext.setText(str(e))
+                return
+            self.driftLimitText = currentLimit
+            self.driftLimit = numberLimit
+            if storyLimits:
+                # stories given a limit of their own are checked against it, results are not read again
+                self.driftLimit = DriftLimits(numberLimit, storyLimits)
+                self.driftLimitText += " with limits of " + ", ".join(storyLimits)
+            self.driftCompare = self.compareBox.isChecked() and not self.driftTable.empty
+            self.driftEnvelope = self.envelopeBox.isChecked()
+            # get drift results as dataframe on worker thread
+            self.request(self.requestDrift, self.driftLimit, top, per, self.driftCompare, self.envelopeBox.isChecked())
         else:
             not_float = "Please input a number for drift limit"
             self.statustext.setText(not_float)
 
+    def showDrift(self, driftTable):
+        # called with drift results from the worker
+        self.driftTable = driftTable
+        shownTable = self.driftTable
+        self.mess_drift = "showing drift results for limit " + self.driftLimitText + "\n"
+        if self.driftEnvelope:
+            self.mess_drift = "showing drift envelope of each story for limit " + self.driftLimitText + "\n"
+        if self.driftCompare:
+            # show change in DCR from the previous check instead
+            shownTable = self.chosenModel.DriftDelta
+            self.mess_drift = "showing change in drift DCR from previous check, %d of %d combos changed \n" % \
+                              (len(self.chosenModel.ChangedCombos), len(self.chosenModel.DriftCombos))
+        self.statustext.setText(self.mess1 + self.mess_drift + self.mess_tors)
+        driftModel = pandasModel(shownTable)  # transform dataframe to use in QTableView
+        self.driftview.setModel(driftModel)  # populate QTableView with drift results
+        self.driftModel = driftModel
+        self.refreshFilters()
+
+        wmin = self.driftview.verticalHeader().width() + 24
+        for i in range(driftModel.columnCount()):
+            wmin += self.driftview.columnWidth(i)
+        self.driftview.setMinimumWidth(wmin)
+        # self.driftview.resize(800, 600)
+        # https: // stackoverflow.com / questions / 41542934 / pyqt - qtablewidget - remove - scrollbar - to - show - full - table
+        self.finishJob()
+
     def gettorsion(self):
         # function that populates torsion results table
-        self.torsTable = self.chosenModel.story_torsion_check()
-        self.mess_tors = "showing torsion results"
+        top, per = self.shownResults()
+        if top is None:
+            self.statustext.setText("Please input a whole number of results to show or leave it blank")
+            return
+        compare = self.compareBox.isChecked() and not self.torsTable.empty
+        self.torsEnvelope = self.envelopeBox.isChecked()
+        # get torsion results as dataframe on worker thread
+        self.request(self.requestTorsion, top, per, compare, self.envelopeBox.isChecked())
+
+    def showTorsion(self, torsTable):
+        # called with torsion results from the worker
+        self.torsTable = torsTable
+        self.mess_tors = "showing torsion envelope of each story" if self.torsEnvelope else "showing torsion results"
         self.statustext.setText(self.mess1 + self.mess_drift + self.mess_tors)
         torsModel = pandasModel(self.torsTable)
         self.torsview.setModel(torsModel)
+        self.torsModel = torsModel
+        self.refreshFilters()
 
         wtmin = self.torsview.verticalHeader().width() + 24
         for i in range(torsModel.columnCount()):
             wtmin += self.torsview.columnWidth(i)
         self.torsview.setMinimumWidth(wtmin)
         # https: // stackoverflow.com / questions / 41542934 / pyqt - qtablewidget - remove - scrollbar - to - show - full - table
+        self.finishJob()
+
+    def filterIndexes(self):
+        # (view model, results frame, ResultsIndex) of each shown table
+        model = self.chosenModel
+        shown = []
+        if model is None:
+            return shown
+        if self.driftModel is not None:
+            if self.driftCompare and model.DeltaIndex is not None:
+                shown.append((self.driftModel, model.DriftDelta, model.DeltaIndex))
+            elif model.DriftIndex is not None:
+                shown.append((self.driftModel, model.StoryDrifts, model.DriftIndex))
+        if self.torsModel is not None and model.TorsionIndex is not None:
+            shown.append((self.torsModel, model.TorsionRatios, model.TorsionIndex))
+        return shown
+
+    def refreshFilters(self):
+        # fill filter choices with the stories, combos and directions of the shown results, keeping the selection
+        boxes = {'Story': self.storyFilter, 'Combo': self.comboFilter, 'Direction': self.directionFilter}
+        for key, box in boxes.items():
+            labels = []
+            for viewModel, frame, index in self.filterIndexes():
+                labels += [label for label in index.labels(key) if label not in labels]
+            current = box.currentData()
+            box.blockSignals(True)
+            while box.count() > 1:
+                box.removeItem(1)
+            for label in labels:
+                box.addItem(str(label), label)
+            box.setCurrentIndex(max(box.findData(current), 0) if current is not None else 0)
+            box.blockSignals(False)
+        self.applyFilters()
+
+    def applyFilters(self):
+        # show rows of the chosen story, combo and direction through the result indexes
+        story = self.storyFilter.currentData()
+        combo = self.comboFilter.currentData()
+        direction = self.directionFilter.currentData()
+        for viewModel, frame, index in self.filterIndexes():
+            if story is None and combo is None and direction is None:
+                viewModel.setLabelFilter(None)
+            else:
+                viewModel.setLabelFilter(frame.index[index.rows(story, combo, direction)])
+
+    def fullResults(self):
+        # tables shown may only have the top rows, full sorted tables are built here for export
+        driftTable = self.driftTable
+        torsTable = self.torsTable
+        if self.chosenModel is not None and self.chosenModel.StoryDrifts is not None and not driftTable.empty:
+            driftTable = drift_results_table(self.chosenModel.StoryDrifts, self.driftLimit)
+        if self.chosenModel is not None and self.chosenModel.TorsionRatios is not None and not torsTable.empty:
+            torsTable = torsion_results_table(self.chosenModel.TorsionRatios)
+        return driftTable, torsTable
 
     def saveResults(self):
         if self.modelPath:
-            excel_path = self.modelPath + '/results.xlsx'
-            with pd.ExcelWriter(excel_path) as writer:
-                self.driftTable.to_excel(writer, sheet_name='drift_results')
-                self.torsTable.to_excel(writer, sheet_name='torsion_results')
-            mess_save = 'results saved to excel'
+            # full tables go to compressed columnar files and excel gets the governing rows,
+            # or every row goes to excel if no columnar format is chosen or pyarrow is not installed
+            driftTable, torsTable = self.fullResults()
+            tables = {'drift': driftTable, 'torsion': torsTable}
+            modelName = ''
+            if self.chosenModel is not None:
+                modelName = self.chosenModel.modelName
+                tables['drift_change'] = self.chosenModel.DriftDelta
+                tables['joint_displacements'] = self.chosenModel.JointDisplacements
+                if self.chosenModel.StoryDrifts is not None and not driftTable.empty:
+                    tables['drift_envelope'] = drift_envelope_table(self.chosenModel.StoryDrifts, self.driftLimit)
+                if self.chosenModel.TorsionRatios is not None and not torsTable.empty:
+                    tables['torsion_envelope'] = torsion_envelope_table(self.chosenModel.TorsionRatios)
+            fmt = self.formatBox.currentData()
+            try:
+                paths = export_results(self.modelPath + '/results', modelName, tables, fmt, self.summaryBox.isChecked(),
+                                       timer=self.chosenModel.Timer if self.chosenModel is not None else None)
+            except ImportError:
+                # pyarrow is not installed, the full tables are written to excel
+                paths = export_results(self.modelPath + '/results', modelName, tables, None)
+                fmt = None
+            mess_save = 'results saved to %d files' % len(paths)
+            if fmt is None and self.formatBox.currentData() is not None:
+                mess_save += ' (install pyarrow for %s files)' % self.formatBox.currentData()
         else:
             mess_save = 'ETABS file path not found'
 
         self.statustext.setText(mess_save)
         pass
 
+    def showTiming(self):
+        # JSON report of time, API calls and result rows of each stage since the model was opened
+        if self.chosenModel is not None and self.chosenModel.Timer is not None:
+            self.statustext.setText(self.chosenModel.Timer.to_json())
+
     # function to close current ETABS model
     def closeModel(self):
-        close_mess = "nothing found to close"
-        if self.chosenModel:
-            close_mess = self.chosenModel.model_close()
         self.chosenModel = None
+        self.request(self.requestClose)
+
+    def modelClosed(self, close_mess):
         self.statustext.setText(close_mess)
+        self.finishJob()
 
     # override close event to close etabs model first
     def closeEvent(self, event):
-        # do stuff
-        if self.chosenModel:
-            self.closeModel()
-            event.accept()  # let the window close
-        else:
-            event.accept()  # let the window close
+        # stop any running job, close the model and ETABS on the worker thread and wait for it before exiting
+        self.worker.cancel()
+        QMetaObject.invokeMethod(self.worker, 'shutdown', Qt.BlockingQueuedConnection)
+        self.workerThread.quit()
+        self.workerThread.wait()
+        event.accept()  # let the window close
 
 
 
@@ -6,46 +6,38 @@ Created on Wed Mar 11 11:28:16 2020
 """
 
 
+import os
 import sys
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QTextEdit, QFileDialog, QApplication
-import pandas as pd
-from openpyxl import load_workbook
-
-
-def reformat_drift_table(inFileName = 'Book1.xlsx'):
-    # function to reformat story drift spreadsheet created by etabs
-    ofile = pd.read_excel(inFileName, header = 1)
-    
-    # remove first and third row which are etabs titles
-    delete_rows = [0, 2]
-    rmvTitleRows = ofile.drop(delete_rows) 
-    
-    # insert initial excel row number
-    excelRow = rmvTitleRows.apply(lambda row: row.name + len(delete_rows) + 1, axis = 1)
-    rmvTitleRows.insert(0,'Initial Row', excelRow, True)
-    
-    # filter for only rows that contain drift combos
-    driftRows = rmvTitleRows.loc[rmvTitleRows['Load Case/Combo'].str.contains('drift', case = False)]
-        
-    # calculate story drift DCR
-    maxDrift = 0.01
-    dcrSeries = driftRows.apply(lambda row: row.Drift/maxDrift, axis = 1)
-    
-    # insert DCR column and sort largest to smallest
-    driftRows.insert(len(driftRows.columns), 'DCR', dcrSeries, True)
-    dfSort = driftRows.sort_values(by=['DCR'], ascending = False)
-    # print(dfSort.head())
-    
-    book = load_workbook(inFileName)  # new data entry without deleting existing
-    
-    # add sorted data to new sheet
-    with pd.ExcelWriter(inFileName, engine = 'openpyxl') as writer:
-        writer.book = book
-        dfSort.to_excel(writer, sheet_name = 'Drift Sorted')
-        writer.save()
-        writer.close()
-
-    return 'reformatting complete'
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QTextEdit, QFileDialog, QApplication, QCheckBox
+from drift_batch import reformat_batch
+from drift_reformat import reformat_drift_sheets
+from stage_timer import StageTimer
+
+
+class BatchWorker(QObject):
+    # reformats many files on a worker thread so the window keeps repainting while the worker processes run
+    # the status of each file and the batch results are sent back to get_file_dialog as signals
+    progress = pyqtSignal(str, str)
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, fileNames, stream, workers, summaryFile):
+        super(BatchWorker, self).__init__()
+        self.fileNames = fileNames
+        self.stream = stream
+        self.workers = workers
+        self.summaryFile = summaryFile
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            statusTable, summary = reformat_batch(self.fileNames, self.stream, self.workers, self.summaryFile,
+                                                  self.progress.emit)
+        except Exception as e:
+            self.failed.emit(str(e) or type(e).__name__)
+        else:
+            self.finished.emit(statusTable, summary)
 
 
 class get_file_dialog(QWidget):
@@ -58,39 +50,99 @@ class get_file_dialog(QWidget):
         # add window title and prompt label text
         self.setWindowTitle("Story Drift Reformatting Tool")
         layout = QVBoxLayout()
-        self.le = QLabel("Select Story Drift File To Reformat")
+        self.le = QLabel("Select Story Drift Files To Reformat")
         layout.addWidget(self.le)
 
         # add button to open file name, connect to open file function
-        self.btn = QPushButton("Choose File")
+        self.btn = QPushButton("Choose Files")
         self.btn.clicked.connect(lambda: self.getfile())
         layout.addWidget(self.btn)
 
+        # option to stream very large exports row by row
+        self.streamBox = QCheckBox("Large file (stream rows, save sorted table to a new workbook)")
+        layout.addWidget(self.streamBox)
+
+        # option to show how long each reformatting step took
+        self.timingBox = QCheckBox("Show timing report")
+        layout.addWidget(self.timingBox)
+
         # add text box to use as status notification, enter initial text
         self.statustext = QTextEdit()
-        self.statustext.setText('Please use button above to choose a file')
+        self.statustext.setText('Please use button above to choose one or more files')
         layout.addWidget(self.statustext)
 
         self.setLayout(layout)
 
     def getfile(self):
-        # function that pulls up get open file name window and re-formats selected file
+        # function that pulls up get open file names window and re-formats selected files
         dlg = QFileDialog()
-        dlg.setFileMode(QFileDialog.AnyFile)
+        dlg.setFileMode(QFileDialog.ExistingFiles)
         dlg.setNameFilter("Excel files (*.xlsx)")
 
-        # open window and extract file name from outputs
-        fileName, others = dlg.getOpenFileName(self, "Choose File")
+        # open window and extract file names from outputs
+        fileNames, others = dlg.getOpenFileNames(self, "Choose Files", "", "Excel files (*.xlsx)")
 
-        # run reformatting if file chosen, otherwise no action
-        if fileName:
+        # run reformatting if files chosen, otherwise no action
+        if len(fileNames) > 1:
+            self.reformatFiles(fileNames)
+        elif fileNames:
+            fileName = fileNames[0]
             mess1 = "Selected File: \n %s \n\n" % fileName
-            file_format = reformat_drift_table(fileName)
+            timer = StageTimer() if self.timingBox.isChecked() else None
+            try:
+                file_format = reformat_drift_sheets(fileName, self.streamBox.isChecked(), timer)[0]
+            except ValueError as e:
+                file_format = str(e)
+            if timer is not None:
+                file_format += "\n\n" + timer.to_json()
             self.statustext.setText(mess1 + file_format)
         else:
             not_opened = "No file was opened"
             self.statustext.setText(not_opened)
 
+    def reformatFiles(self, fileNames):
+        # reformat many files in worker processes started from a worker thread, showing the status of each file
+        # as it finishes, the file dialog button is disabled until the batch is done
+        self.batchLines = ["Reformatting %d files" % len(fileNames)]
+        self.statustext.setText(self.batchLines[0])
+        self.btn.setEnabled(False)
+
+        self.summaryFile = os.path.join(os.path.dirname(fileNames[0]), 'Drift Summary.xlsx')
+        workers = max(1, min(len(fileNames), (os.cpu_count() or 2) - 1))
+        self.batchThread = QThread()
+        self.batchWorker = BatchWorker(fileNames, self.streamBox.isChecked(), workers, self.summaryFile)
+        self.batchWorker.moveToThread(self.batchThread)
+        self.batchThread.started.connect(self.batchWorker.run)
+        self.batchWorker.progress.connect(self.batchProgress)
+        self.batchWorker.finished.connect(self.batchFinished)
+        self.batchWorker.failed.connect(self.batchFailed)
+        self.batchWorker.finished.connect(self.batchThread.quit)
+        self.batchWorker.failed.connect(self.batchThread.quit)
+        self.batchThread.start()
+
+    def batchProgress(self, fileName, status):
+        self.batchLines.append("%s: %s" % (os.path.basename(fileName), status))
+        self.statustext.setText("\n".join(self.batchLines))
+
+    def batchFinished(self, statusTable, summary):
+        lines = self.batchLines
+        if not summary.empty:
+            top = summary.iloc[0]
+            lines.append("\ngoverning DCR %.2f in %s, %s" % (top['DCR'], top['File'], top['Sheet']))
+        lines.append("summary of governing DCRs saved to " + self.summaryFile)
+        if self.timingBox.isChecked():
+            # the stages of each file ran in worker processes, the report gives the time of each file
+            lines.append("\nseconds per file:")
+            lines.extend("%s: %.2f" % (row.File, row.Seconds) for row in statusTable.itertuples())
+        self.statustext.setText("\n".join(lines))
+        self.btn.setEnabled(True)
+
+    def batchFailed(self, message):
+        self.batchLines.append("\nreformatting stopped: " + message)
+        self.statustext.setText("\n".join(self.batchLines))
+        self.btn.setEnabled(True)
+
+
 # set up main application with get_file_dialog widget
 def main():
    app = QApplication(sys.argv)
@@ -0,0 +1,64 @@
+# compares adding the 'Drift Sorted' sheet to a large export by loading and saving the whole workbook with
+# openpyxl (the earlier ExcelWriter append) against appending the sheet to the xlsx package at the zip level
+# the export has a Story Drifts sheet and a large Joint Drifts sheet that only the openpyxl path re-parses
+# run with: python benchmarks/bench_append.py [stories] [combos]
+import os
+import shutil
+import sys
+import tempfile
+import time
+import pandas as pd
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drift_reformat import sort_drift_table, write_sorted_sheets
+from fake_etabs import FakeBuilding, write_story_drift_export
+
+
+def write_export(path, building):
+    # Story Drifts export with a Joint Drifts sheet of every joint, as ETABS exports both tables to one workbook
+    write_story_drift_export(path, building)
+    frames = []
+    for combo in building.combos:
+        stories, labels, dispx, dispy, drifx, drify = building.joint_drifts(combo)
+        frames.append(pd.DataFrame({'Story': stories, 'Label': labels, 'Output Case': combo, 'Disp X': dispx,
+                                    'Disp Y': dispy, 'Drift X': drifx, 'Drift Y': drify}))
+    with pd.ExcelWriter(path, engine='openpyxl', mode='a') as writer:
+        pd.concat(frames, ignore_index=True).to_excel(writer, sheet_name='Joint Drifts', index=False)
+
+
+def openpyxl_append(path, sortedTables):
+    # the earlier path, every sheet of the workbook is parsed and written again
+    with pd.ExcelWriter(path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+        for sheetName, dfSort in sortedTables.items():
+            dfSort.to_excel(writer, sheet_name=sheetName)
+
+
+def main():
+    nstories = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    ncombos = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    building = FakeBuilding(nstories=nstories, njoints=100, ncombos=ncombos)
+    outdir = tempfile.mkdtemp()
+    source = os.path.join(outdir, 'export.xlsx')
+    write_export(source, building)
+    sortedTables = {'Drift Sorted': sort_drift_table(source)}
+    print('%d sorted rows, export of %.1f MB' % (len(sortedTables['Drift Sorted']), os.path.getsize(source) / 1e6))
+
+    print('%-24s %10s %10s %10s' % ('append', 'time (s)', 'rerun (s)', 'size (MB)'))
+    for label, append in [('openpyxl load and save', openpyxl_append), ('zip level', write_sorted_sheets)]:
+        path = os.path.join(outdir, label.replace(' ', '_') + '.xlsx')
+        shutil.copyfile(source, path)
+        times = []
+        for run in range(2):
+            # the second run replaces the sheet written by the first
+            start = time.perf_counter()
+            append(path, sortedTables)
+            times.append(time.perf_counter() - start)
+        check = pd.read_excel(path, sheet_name='Drift Sorted', index_col=0)
+        assert load_workbook(path, read_only=True).sheetnames == ['Story Drifts', 'Joint Drifts', 'Drift Sorted']
+        assert len(check) == len(sortedTables['Drift Sorted'])
+        print('%-24s %10.2f %10.2f %10.1f' % (label, times[0], times[1], os.path.getsize(path) / 1e6))
+
+
+if __name__ == '__main__':
+    main()
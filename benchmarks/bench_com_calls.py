@@ -0,0 +1,46 @@
+# compares API call counts and time of batched and per-combo result extraction using fake_etabs
+# run with: python benchmarks/bench_com_calls.py
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, FakeSapModel
+
+
+def run_checks(building, batchresults, latency):
+    # open a fake model, run drift and torsion checks and return call count, time and results
+    sapmodel = FakeSapModel(building, latency=latency)
+    model = EtabsModel(os.path.join(tempfile.gettempdir(), 'FakeModel.EDB'), batchresults=batchresults,
+                       sapmodel=sapmodel)
+    sapmodel.calls.clear()
+    start = time.perf_counter()
+    drifts = model.story_drift_results(0.01)
+    torsion = model.story_torsion_check()
+    elapsed = time.perf_counter() - start
+    return sapmodel.calls, elapsed, drifts, torsion
+
+
+def main():
+    latency = 0.005  # simulated seconds per COM round-trip
+    combos = ['DRIFT %d' % (i + 1) for i in range(40)]
+    building = FakeBuilding(nstories=30, njoints=50, combos=combos)
+
+    print('%-10s %8s %10s %10s' % ('mode', 'calls', 'results', 'time (s)'))
+    results = {}
+    for mode, batch in (('per-combo', False), ('batch', True)):
+        calls, elapsed, drifts, torsion = run_checks(building, batch, latency)
+        nresults = calls['Results.StoryDrifts'] + calls['Results.JointDrifts']
+        print('%-10s %8d %10d %10.3f' % (mode, sum(calls.values()), nresults, elapsed))
+        results[mode] = (drifts, torsion)
+
+    # both modes must give the same tables
+    for old, new in zip(results['per-combo'], results['batch']):
+        key = list(old.columns[:3])
+        assert old.sort_values(key).reset_index(drop=True).equals(new.sort_values(key).reset_index(drop=True))
+
+
+if __name__ == '__main__':
+    main()
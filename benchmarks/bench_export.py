@@ -0,0 +1,51 @@
+# compares write time and file size of the full results workbook with parquet and feather files
+# run with: python benchmarks/bench_export.py [stories] [joints]
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, FakeSapModel
+from results_export import export_results
+
+
+def main():
+    nstories = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    njoints = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    combos = ['DRIFT %d' % (i + 1) for i in range(24)]
+    building = FakeBuilding(nstories=nstories, njoints=njoints, combos=combos)
+    model = EtabsModel(os.path.join(tempfile.gettempdir(), 'FakeModel.EDB'), sapmodel=FakeSapModel(building))
+    tables = {'drift': model.story_drift_results(0.01), 'torsion': model.story_torsion_check(),
+              'joint_displacements': model.JointDisplacements}
+    print('%d drift, %d torsion and %d joint rows' % tuple(len(table) for table in tables.values()))
+
+    outdir = tempfile.mkdtemp()
+    print('%-28s %10s %10s' % ('output', 'time (s)', 'size (MB)'))
+    runs = [('xlsx, all rows', 'excel', None, False),
+            ('parquet + xlsx summary', 'parquet', 'parquet', True),
+            ('feather + xlsx summary', 'feather', 'feather', True),
+            ('parquet only', 'parquet_only', 'parquet', False)]
+    for label, name, fmt, summary in runs:
+        basepath = os.path.join(outdir, name)
+        start = time.perf_counter()
+        if fmt is None:
+            # the earlier saveResults path, every row of every table in one workbook
+            paths = [basepath + '.xlsx']
+            with pd.ExcelWriter(paths[0]) as writer:
+                for sheet, table in tables.items():
+                    table.to_excel(writer, sheet_name=sheet)
+        else:
+            paths = export_results(basepath, model.modelName, tables, fmt, summary)
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(path) for path in paths)
+        print('%-28s %10.2f %10.2f' % (label, elapsed, size / 1e6))
+        for path in paths:
+            os.remove(path)
+    os.rmdir(outdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# measures import time of the headless modules with python -X importtime and checks it against a budget
+# run with: python benchmarks/bench_import.py [budget seconds]
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADLESS = ['etabs_results', 'drift_reformat', 'results_cache', 'drift_cli']
+GUI_MODULES = ('PyQt5', 'comtypes')
+BUDGET = 2.0  # seconds for importing every headless module, pandas and numpy included
+
+
+def import_times(modules):
+    # cumulative import time in seconds of each top level module imported, and all module names
+    code = 'import ' + ', '.join(modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    names = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        names.append(name.strip())
+        if not name.startswith('  '):  # top level imports are not indented
+            times[name.strip()] = int(cumulative_us) / 1e6
+    return times, names
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET
+    times, names = import_times(HEADLESS)
+    total = sum(times.values())
+    for name, seconds in sorted(times.items(), key=lambda item: -item[1])[:10]:
+        print('%-30s %8.3f s' % (name, seconds))
+    print('%-30s %8.3f s (budget %.3f s)' % ('total', total, budget))
+
+    loaded = [name for name in names if name.split('.')[0] in GUI_MODULES]
+    if loaded:
+        sys.exit('headless import loaded ' + ', '.join(loaded))
+    if total > budget:
+        sys.exit('headless import over budget')
+
+
+if __name__ == '__main__':
+    main()
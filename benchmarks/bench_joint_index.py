@@ -0,0 +1,38 @@
+# compares the torsion check of every joint against joints reduced by the joint index to rigid diaphragm hull vertices
+# results come from fake_etabs, the torsion ratios of both must match
+# run with: python benchmarks/bench_joint_index.py [joints per diaphragm]
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, FakeSapModel
+
+
+def main():
+    njoints = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    building = FakeBuilding(nstories=30, njoints=njoints, ncombos=8, ndiaphragms=2)
+    print('%-10s %10s %12s %12s %12s' % ('joints', 'rows', 'memory (MB)', 'index (s)', 'check (s)'))
+    ratios = []
+    for mode, reducejoints in (('all', False), ('reduced', True)):
+        model = EtabsModel(os.path.join(tempfile.gettempdir(), 'FakeModel.EDB'),
+                           sapmodel=FakeSapModel(building, analyzed=True), checkanalysis=True,
+                           reducejoints=reducejoints)
+        start = time.perf_counter()
+        if reducejoints:
+            model.build_joint_index()
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        torsion = model.story_torsion_check()
+        checked = time.perf_counter() - start
+        memory = model.JointDisplacements.memory_usage(deep=True).sum() / 1e6
+        print('%-10s %10d %12.2f %12.2f %12.3f' % (mode, len(model.JointDisplacements), memory, indexed, checked))
+        ratios.append(torsion.sort_values(['Story', 'Load Combo'])['Ratio'].to_numpy())
+    assert np.allclose(ratios[0], ratios[1], rtol=1e-9)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# times the torsion check on a synthetic joint drift export of about 10^6 rows read by TableFileBackend
+# run with: python benchmarks/bench_offline.py [rows]
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, write_joint_drift_export
+from results_backends import TableFileBackend
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    combos = ['DRIFT %d' % (i + 1) for i in range(20)] + ['DCON %d' % (i + 1) for i in range(5)]
+    njoints = 400
+    building = FakeBuilding(nstories=max(1, rows // (njoints * len(combos))), njoints=njoints, combos=combos)
+    path = os.path.join(tempfile.gettempdir(), 'bench_joint_drifts.csv')
+
+    start = time.perf_counter()
+    write_joint_drift_export(path, building)
+    nrows = len(building.combos) * len(building.stories) * len(building.labels)
+    print('wrote %d rows (%.1f MB) in %.2f s' % (nrows, os.path.getsize(path) / 1e6, time.perf_counter() - start))
+
+    try:
+        start = time.perf_counter()
+        model = EtabsModel(path, backend=TableFileBackend(jointfile=path))
+        opened = time.perf_counter() - start
+        start = time.perf_counter()
+        torsion = model.story_torsion_check()
+        checked = time.perf_counter() - start
+        print('combo names %.2f s, joint drifts and torsion check %.2f s' % (opened, checked))
+        print('%d joint rows of %d drift combos, %d torsion rows'
+              % (len(model.JointDisplacements), len(model.DriftCombos), len(torsion)))
+        assert len(model.JointDisplacements) == nrows * 20 // len(combos)
+        assert np.isfinite(torsion['Ratio']).all()
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
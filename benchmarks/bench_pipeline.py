@@ -0,0 +1,44 @@
+# compares reading joint drifts one combo at a time and converting them afterwards against the results pipeline,
+# which converts each combo and computes its torsion ratios on a worker thread while the next combo is read
+# COM call time is simulated by the latency of fake_etabs.FakeSapModel
+# the pipeline can only hide the conversion time, printed first as the check with no latency: on this model it
+# saves at most 0.3 s of 2.2 s at 0.01 s latency and less of the total as latency grows, with no latency the
+# thread hand-off makes it slower than reading sequentially, and a deeper pipeline or more workers gains nothing
+# as the conversion holds the GIL
+# run with: python benchmarks/bench_pipeline.py [latency s]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, FakeSapModel
+from results_pipeline import ResultsPipeline
+
+
+def torsion_check(building, latency, pipeline):
+    # torsion check of a fake model read one drift combo at a time, returns (elapsed time, torsion rows)
+    model = EtabsModel(os.path.join(tempfile.gettempdir(), 'FakeModel.EDB'),
+                       sapmodel=FakeSapModel(building, latency=latency, analyzed=True),
+                       batchresults=False, checkanalysis=True, pipeline=pipeline)
+    start = time.perf_counter()
+    torsion = model.story_torsion_check()
+    return time.perf_counter() - start, len(torsion)
+
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.01
+    building = FakeBuilding(nstories=60, njoints=400, ncombos=24)
+    print('%-28s %10s %10s' % ('mode', 'rows', 'time (s)'))
+    elapsed, rows = torsion_check(building, 0.0, None)
+    print('%-28s %10d %10.2f' % ('conversion, no latency', rows, elapsed))
+    modes = [('sequential', None),
+             ('pipeline depth 2', ResultsPipeline(depth=2))]
+    for mode, pipeline in modes:
+        elapsed, rows = torsion_check(building, latency, pipeline)
+        print('%-28s %10d %10.2f' % (mode, rows, elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+# compares opening a series of models with a fresh program each time against reusing a warm program from the pool
+# program start time is simulated by fake_etabs.FakeEtabsFactory
+# run with: python benchmarks/bench_pool.py [start delay s]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etabs_pool import EtabsInstancePool
+from etabs_results import EtabsModel
+from fake_etabs import FakeEtabsFactory
+
+
+def open_models(pool, count):
+    # open, check and close count models one after another, returns elapsed time
+    start = time.perf_counter()
+    for i in range(count):
+        model = EtabsModel(os.path.join(tempfile.gettempdir(), 'Variant%d.EDB' % i), pool=pool)
+        model.story_drift_results(0.01)
+        model.model_close()
+    return time.perf_counter() - start
+
+
+def main():
+    startdelay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    count = 8
+    print('%-12s %8s %8s %10s' % ('mode', 'started', 'reused', 'time (s)'))
+    # a negative idle timeout exits the program as soon as the model is closed, as without a pool
+    for mode, idletimeout in (('restart', -1.0), ('warm pool', 600.0)):
+        pool = EtabsInstancePool(FakeEtabsFactory(startdelay=startdelay), maxsize=1, idletimeout=idletimeout)
+        elapsed = open_models(pool, count)
+        pool.close()
+        print('%-12s %8d %8d %10.2f' % (mode, pool.Started, pool.Reused, elapsed))
+
+
+if __name__ == '__main__':
+    main()
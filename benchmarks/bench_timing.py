@@ -0,0 +1,37 @@
+# overhead of stage timing on the drift and torsion checks, without a timer, disabled and enabled
+# run with: python benchmarks/bench_timing.py
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, FakeSapModel
+from stage_timer import StageTimer
+
+
+def run_checks(building, timer, repeat):
+    # best time of repeat opens and checks of the fake model
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        model = EtabsModel(os.path.join(tempfile.gettempdir(), 'FakeModel.EDB'), sapmodel=FakeSapModel(building),
+                           batchresults=False, timer=timer)
+        model.story_drift_results(0.01)
+        model.story_torsion_check()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    combos = ['DRIFT %d' % (i + 1) for i in range(40)]
+    building = FakeBuilding(nstories=20, njoints=30, combos=combos)
+    print('%-10s %10s' % ('timer', 'time (s)'))
+    for label, timer in (('none', None), ('disabled', StageTimer(enabled=False)), ('enabled', StageTimer())):
+        print('%-10s %10.4f' % (label, run_checks(building, timer, 10)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# compares full sorting with top-N partial selection of drift results
+# run with: python benchmarks/bench_topn.py
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etabs_results import drift_results_table
+
+
+def synthetic_story_drifts(nrows, nstories=60, seed=0):
+    # story drift rows shaped like EtabsModel.StoryDrifts
+    rng = np.random.default_rng(seed)
+    stories = pd.Categorical.from_codes(rng.integers(0, nstories, nrows),
+                                        ['Story%d' % (i + 1) for i in range(nstories)])
+    combos = pd.Categorical.from_codes(rng.integers(0, 40, nrows), ['DRIFT %d' % (i + 1) for i in range(40)])
+    directions = pd.Categorical.from_codes(rng.integers(0, 2, nrows), ['X', 'Y'])
+    return pd.DataFrame({'Story': stories, 'Combo': combos, 'Direction': directions,
+                         'Drift': rng.gamma(2.0, 0.002, nrows)})
+
+
+def best_time(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    top = 300
+    print('%10s %12s %12s %16s %14s' % ('rows', 'full (s)', 'top (s)', 'top/dir (s)', 'top/story (s)'))
+    for nrows in (10 ** 5, 10 ** 6, 10 ** 7):
+        df = synthetic_story_drifts(nrows)
+        full = best_time(lambda: drift_results_table(df, 0.01))
+        topAll = best_time(lambda: drift_results_table(df, 0.01, top))
+        topDir = best_time(lambda: drift_results_table(df, 0.01, top, 'Direction'))
+        topStory = best_time(lambda: drift_results_table(df, 0.01, top, 'Story'))
+        print('%10d %12.4f %12.4f %16.4f %14.4f' % (nrows, full, topAll, topDir, topStory))
+
+        # top rows must match the head of the full sorted table
+        assert drift_results_table(df, 0.01, top)['Drift'].tolist() == \
+            drift_results_table(df, 0.01).head(top)['Drift'].tolist()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# benchmark of the grouped torsion calculation used by EtabsModel.story_torsion_check
+# run with: python benchmarks/bench_torsion.py
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etabs_results import story_torsion_table
+
+
+def synthetic_joint_drifts(nstories, njoints, ncombos, seed=0):
+    # joint displacements laid out like the Results.JointDrifts output of every drift combo
+    rng = np.random.default_rng(seed)
+    nrows = nstories * njoints * ncombos
+    stories = np.repeat(np.array(['Story%d' % (i + 1) for i in range(nstories)]), njoints)
+    jdf = pd.DataFrame({'label': np.tile(np.arange(njoints).astype(str), nstories * ncombos),
+                        'Story': np.tile(stories, ncombos),
+                        'Combo': np.repeat(np.array(['DRIFT%d' % (i + 1) for i in range(ncombos)]), nstories * njoints),
+                        'DispX': rng.normal(1.0, 0.2, nrows),
+                        'DispY': rng.normal(0.5, 0.2, nrows)})
+    return jdf
+
+
+def loop_torsion_table(jdf):
+    # previous per story and combo implementation, kept for comparison
+    rows = []
+    for dcombo in jdf.Combo.unique():
+        for story in jdf.Story.unique():
+            temp_df = jdf[(jdf['Story'] == story) & (jdf['Combo'] == dcombo)]
+            direction = 'X'
+            averaged = abs(temp_df['DispX'].mean())
+            maximumd = temp_df['DispX'].abs().max()
+            averagey = abs(temp_df['DispY'].mean())
+            if averagey > averaged:
+                averaged = averagey
+                maximumd = temp_df['DispY'].abs().max()
+                direction = 'Y'
+            rows.append([story, dcombo, direction, maximumd, averaged, maximumd / averaged])
+    return pd.DataFrame(rows, columns=['Story', 'Load Combo', 'Direction', 'Max Displ', 'Avg Displ', 'Ratio'])
+
+
+def best_time(func, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    nstories, ncombos = 60, 40
+
+    # check grouped result against loop result on a small model
+    small = synthetic_joint_drifts(10, 20, 4)
+    key = ['Load Combo', 'Story']
+    grouped = story_torsion_table(small).sort_values(key).reset_index(drop=True)
+    looped = loop_torsion_table(small).sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(grouped, looped, check_dtype=False)
+
+    print('%10s %12s %12s %14s' % ('joints', 'rows', 'time (s)', 'us per row'))
+    for njoints in (10, 50, 100, 500, 1000):
+        jdf = synthetic_joint_drifts(nstories, njoints, ncombos)
+        elapsed = best_time(story_torsion_table, jdf)
+        print('%10d %12d %12.4f %14.4f' % (njoints, len(jdf), elapsed, 1e6 * elapsed / len(jdf)))
+
+    jdf = synthetic_joint_drifts(nstories, 10, ncombos)
+    print('\nloop implementation, %d rows: %.3f s' % (len(jdf), best_time(loop_torsion_table, jdf, repeat=1)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+# benchmark suite of each stage of the drift and torsion checks at several building sizes
+# written as asv benchmarks (asv run, see asv.conf.json), or run every case once with: python benchmarks/suite.py
+# results come from fake_etabs, so no ETABS is needed
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drift_reformat import reformat_drift_table, stream_drift_table
+from etabs_results import EtabsModel, ResultsIndex, drift_envelope_table, drift_results_table, story_torsion_table, \
+    torsion_envelope_table, torsion_results_table
+from fake_etabs import FakeBuilding, FakeSapModel, write_joint_drift_export, write_story_drift_export
+from results_backends import TableFileBackend
+
+# (stories, joints per diaphragm, drift combos) of each building size
+SCALES = {'small': (10, 20, 8), 'medium': (40, 100, 24), 'large': (80, 300, 48)}
+
+
+def scale_building(scale):
+    nstories, njoints, ncombos = SCALES[scale]
+    return FakeBuilding(nstories=nstories, njoints=njoints, ncombos=ncombos)
+
+
+def open_fake_model(building, batchresults=True):
+    sapmodel = FakeSapModel(building, analyzed=True)
+    return EtabsModel(os.path.join(tempfile.gettempdir(), 'FakeModel.EDB'), sapmodel=sapmodel,
+                      batchresults=batchresults, checkanalysis=True)
+
+
+class Extraction:
+    # reading story and joint drifts through the fake SapModel into result frames
+    params = [list(SCALES), [True, False]]
+    param_names = ['scale', 'batchresults']
+
+    def setup(self, scale, batchresults):
+        self.model = open_fake_model(scale_building(scale), batchresults)
+
+    def time_extract_story_drifts(self, scale, batchresults):
+        self.model.Backend.refresh()
+        self.model.extract_story_drifts()
+
+    def time_extract_joint_drifts(self, scale, batchresults):
+        self.model.Backend.refresh()
+        self.model.extract_joint_drifts()
+
+
+class Checks:
+    # full drift and torsion checks of an opened model
+    params = [list(SCALES)]
+    param_names = ['scale']
+
+    def setup(self, scale):
+        self.model = open_fake_model(scale_building(scale))
+        self.model.story_drift_results(0.01)
+        self.limit = 0.02
+
+    def time_story_drift_results(self, scale):
+        self.model.invalidate_cache()  # read results again instead of reusing those of the last call
+        self.model.story_drift_results(0.01)
+
+    def time_drift_limit_change(self, scale):
+        # story drifts of the same analysis are reused, only DCR is recomputed
+        self.model.story_drift_results(self.limit)
+        self.limit = 0.025 if self.limit == 0.02 else 0.02
+
+    def time_story_torsion_check(self, scale):
+        self.model.story_torsion_check()
+
+    def peakmem_story_torsion_check(self, scale):
+        self.model.story_torsion_check()
+
+
+class Tables:
+    # result tables built from frames already read
+    params = [list(SCALES)]
+    param_names = ['scale']
+
+    def setup(self, scale):
+        model = open_fake_model(scale_building(scale))
+        self.storyDrifts = model.extract_story_drifts()
+        self.jointDisplacements = model.extract_joint_drifts()
+        self.torsionRatios = story_torsion_table(self.jointDisplacements)
+        self.driftIndex = ResultsIndex(self.storyDrifts)
+        self.story = self.driftIndex.labels('Story')[-1]
+        self.combo = self.driftIndex.labels('Combo')[0]
+
+    def time_drift_results_table(self, scale):
+        drift_results_table(self.storyDrifts, 0.01)
+
+    def time_drift_results_top(self, scale):
+        drift_results_table(self.storyDrifts, 0.01, 50, 'Direction')
+
+    def time_story_torsion_table(self, scale):
+        story_torsion_table(self.jointDisplacements)
+
+    def time_torsion_results_table(self, scale):
+        torsion_results_table(self.torsionRatios)
+
+    def time_drift_envelope_table(self, scale):
+        drift_envelope_table(self.storyDrifts, 0.01)
+
+    def time_torsion_envelope_table(self, scale):
+        torsion_envelope_table(self.torsionRatios)
+
+    def time_results_index(self, scale):
+        ResultsIndex(self.storyDrifts)
+
+    def time_index_story_lookup(self, scale):
+        self.driftIndex.rows(self.story)
+
+    def time_index_cell_lookup(self, scale):
+        self.driftIndex.rows(self.story, self.combo, 'X')
+
+    def time_filter_story(self, scale):
+        # the same query by filtering the frame, for comparison with the index lookups
+        self.storyDrifts[self.storyDrifts['Story'] == self.story]
+
+
+class Exports:
+    # reformatting and offline checks of synthetic ETABS exports
+    params = [list(SCALES)]
+    param_names = ['scale']
+    timeout = 300
+
+    def setup(self, scale):
+        building = scale_building(scale)
+        self.tempdir = tempfile.mkdtemp()
+        self.storyFile = write_story_drift_export(os.path.join(self.tempdir, 'StoryDrifts.xlsx'), building)
+        self.jointFile = write_joint_drift_export(os.path.join(self.tempdir, 'JointDrifts.csv'), building)
+        self.reformatFile = os.path.join(self.tempdir, 'Reformat.xlsx')
+        shutil.copyfile(self.storyFile, self.reformatFile)
+
+    def teardown(self, scale):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def time_stream_drift_table(self, scale):
+        stream_drift_table(self.storyFile)
+
+    def time_reformat_drift_table(self, scale):
+        # read, sort and append the 'Drift Sorted' sheet, repeats replace the sheet added by the first run
+        reformat_drift_table(self.reformatFile)
+
+    def time_offline_story_drifts(self, scale):
+        model = EtabsModel(self.storyFile, backend=TableFileBackend(self.storyFile))
+        model.story_drift_results(0.01)
+
+    def time_offline_torsion_check(self, scale):
+        model = EtabsModel(self.jointFile, backend=TableFileBackend(jointfile=self.jointFile))
+        model.story_torsion_check()
+
+
+def main():
+    # run each case once at every scale without asv
+    scales = sys.argv[1:] or list(SCALES)
+    print('%-40s %-8s %10s' % ('benchmark', 'scale', 'time (s)'))
+    for suite in (Extraction, Checks, Tables, Exports):
+        for scale in scales:
+            cases = [(scale,)] if len(suite.params) == 1 else [(scale, extra) for extra in suite.params[1]]
+            for args in cases:
+                bench = suite()
+                bench.setup(*args)
+                try:
+                    for name in sorted(dir(suite)):
+                        if not name.startswith('time_'):
+                            continue
+                        start = time.perf_counter()
+                        getattr(bench, name)(*args)
+                        label = '%s.%s' % (suite.__name__, name[5:]) + ('' if len(args) == 1 else ' %s' % args[1])
+                        print('%-40s %-8s %10.4f' % (label, scale, time.perf_counter() - start))
+                finally:
+                    if hasattr(bench, 'teardown'):
+                        bench.teardown(*args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# reformatting of many story drift exports at once using a pool of worker processes
+# every story drift sheet of each workbook is sorted, and the governing DCR of each sheet and direction
+# across all workbooks is collected in one summary workbook
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from drift_reformat import reformat_drift_sheets
+
+SUMMARY_NAME = 'Drift Summary.xlsx'
+
+
+def find_exports(patterns):
+    # list of exported workbooks in directories or matching glob patterns, sorted workbooks written earlier are left out
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*.xlsx')
+        for path in sorted(glob.glob(pattern)):
+            name = os.path.basename(path)
+            if name.endswith(' - Drift Sorted.xlsx') or name == SUMMARY_NAME or name.startswith('~$'):
+                continue
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def governing_rows(sortedTables, fileName):
+    # largest DCR row of each direction of each sorted table, with file and sheet columns
+    frames = []
+    for sheetName, dfSort in sortedTables.items():
+        rows = dfSort.drop_duplicates('Direction') if 'Direction' in dfSort.columns else dfSort.head(1)
+        rows = rows.reset_index(drop=True)
+        rows.insert(0, 'Sheet', sheetName)
+        rows.insert(0, 'File', os.path.basename(fileName))
+        frames.append(rows)
+    return frames
+
+
+def reformat_file(inFileName, stream=False):
+    # reformat every drift sheet of one export in a worker process
+    # returns (file, status, governing rows or None, seconds), errors are reported in the status
+    start = time.perf_counter()
+    try:
+        message, sortedTables = reformat_drift_sheets(inFileName, stream)
+    except Exception as e:
+        return inFileName, 'failed: %s' % e, None, time.perf_counter() - start
+    return inFileName, message, governing_rows(sortedTables, inFileName), time.perf_counter() - start
+
+
+def reformat_batch(files, stream=False, workers=2, summaryFile=None, progress=None):
+    # reformat files across at most workers processes, progress is called with (file, status) as each one finishes
+    # the summary workbook gets a 'Governing DCR' sheet sorted by DCR and a 'Files' sheet of the status of each file
+    # returns the status and governing rows frames
+    if not files:
+        raise FileNotFoundError('no drift exports to reformat')
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(reformat_file, fileName, stream) for fileName in files]
+        for future in as_completed(futures):
+            fileName, status, rows, seconds = future.result()
+            results[fileName] = (status, rows, seconds)
+            if progress is not None:
+                progress(fileName, status)
+
+    statusTable = pd.DataFrame({'File': [os.path.basename(fileName) for fileName in files],
+                                'Status': [results[fileName][0] for fileName in files],
+                                'Seconds': [round(results[fileName][2], 2) for fileName in files]})
+    frames = [frame for fileName in files if results[fileName][1] for frame in results[fileName][1]]
+    summary = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['File', 'Sheet', 'DCR'])
+    summary = summary.sort_values(by=['DCR'], ascending=False)
+
+    if summaryFile is None:
+        summaryFile = os.path.join(os.path.dirname(files[0]), SUMMARY_NAME)
+    with pd.ExcelWriter(summaryFile) as writer:
+        summary.to_excel(writer, sheet_name='Governing DCR', index=False)
+        statusTable.to_excel(writer, sheet_name='Files', index=False)
+    return statusTable, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sort the story drift tables of many ETABS exports')
+    parser.add_argument('files', nargs='+', help='exported .xlsx story drift tables, directories or glob patterns')
+    parser.add_argument('--stream', action='store_true', help='stream rows of very large exports')
+    parser.add_argument('-w', '--workers', type=int, default=2, help='number of files to reformat at once')
+    parser.add_argument('-s', '--summary', default=None, help='summary workbook to write')
+    args = parser.parse_args()
+    statusTable, summary = reformat_batch(find_exports(args.files), args.stream, args.workers, args.summary,
+                                          lambda fileName, status: print(fileName + ': ' + status))
+    print('reformatted %d of %d files' % ((~statusTable['Status'].str.startswith('failed')).sum(), len(statusTable)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+# command line entry point for headless drift and torsion checks, drift table reformatting and model sweeps
+# modules are imported inside each command so PyQt5 is never loaded and comtypes only when ETABS is started
+import argparse
+import sys
+
+
+def write_table(table, outpath):
+    # write table to csv, parquet, feather or excel by file extension, or print the governing rows if no file is given
+    if outpath is None:
+        print(table.head(20).to_string())
+    elif outpath.lower().endswith('.csv'):
+        table.to_csv(outpath, index=False)
+    elif outpath.lower().endswith(('.parquet', '.feather')):
+        from results_export import write_columnar
+
+        write_columnar(table.reset_index(drop=True), outpath, outpath.rsplit('.', 1)[1].lower())
+    else:
+        table.to_excel(outpath)
+
+
+def write_timing(timer, args):
+    # timing report as JSON to the file given with --timing, or to stderr
+    if timer is None:
+        return
+    if args.timing == '-':
+        print(timer.to_json(), file=sys.stderr)
+    else:
+        with open(args.timing, 'w') as f:
+            f.write(timer.to_json())
+
+
+def make_timer(args):
+    from stage_timer import StageTimer
+
+    return StageTimer() if args.timing else None
+
+
+def open_model(args):
+    from etabs_results import EtabsModel
+    from results_cache import ResultsCache
+
+    cache = ResultsCache(args.cache_dir) if args.cache else None
+    progress = (lambda message: print(message, file=sys.stderr)) if args.verbose else None
+    backend = None
+    if not args.model.lower().endswith('.edb') or args.joint_table is not None:
+        # exported results tables are read without ETABS
+        from results_backends import TableFileBackend
+
+        backend = TableFileBackend(args.model, args.joint_table)
+    pipeline = None
+    if args.pipeline:
+        from results_pipeline import ResultsPipeline
+
+        pipeline = ResultsPipeline(combos=args.pipeline)
+    return EtabsModel(args.model, cache=cache, checkanalysis=args.check_analysis, progress=progress,
+                      backend=backend, timer=make_timer(args), pipeline=pipeline, reducejoints=args.reduce_joints)
+
+
+def drift_limit(args):
+    # drift limit, or a DriftLimits if any story or combo has a limit of its own
+    from etabs_results import DriftLimits
+
+    stories = dict(item for limits in args.story_limit for item in limits.items())
+    combos = dict(item for limits in args.combo_limit for item in limits.items())
+    if not stories and not combos:
+        return args.limit
+    return DriftLimits(args.limit, stories, combos)
+
+
+def run_drift(args):
+    model = open_model(args)
+    try:
+        table = model.story_drift_results(drift_limit(args), args.top, args.per, envelope=args.envelope)
+    finally:
+        model.model_close()
+    write_table(table, args.output)
+    write_timing(model.Timer, args)
+
+
+def run_torsion(args):
+    model = open_model(args)
+    try:
+        table = model.story_torsion_check(args.top, args.per, envelope=args.envelope)
+    finally:
+        model.model_close()
+    write_table(table, args.output)
+    write_timing(model.Timer, args)
+
+
+def run_reformat(args):
+    from drift_batch import find_exports, reformat_batch
+    from drift_reformat import reformat_drift_sheets
+
+    files = find_exports(args.files)
+    if len(files) > 1:
+        # many exports are reformatted in worker processes, with a summary workbook of governing DCRs
+        statusTable, summary = reformat_batch(files, args.stream, args.workers, args.summary,
+                                              lambda fileName, status: print(fileName + ': ' + status))
+        print('reformatted %d of %d files' % ((~statusTable['Status'].str.startswith('failed')).sum(),
+                                               len(statusTable)))
+        return
+    timer = make_timer(args)
+    for fileName in files:
+        print(fileName + ': ' + reformat_drift_sheets(fileName, args.stream, timer)[0])
+    write_timing(timer, args)
+
+
+def run_sweep(args):
+    from drift_sweep import print_status, sweep_models
+
+    fmt = None if args.format == 'excel' else args.format
+    driftTable, torsTable, statusTable = sweep_models(args.models, args.output, drift_limit(args), args.workers,
+                                                      fmt=fmt)
+    print_status(statusTable)
+
+
+def add_model_arguments(parser):
+    parser.add_argument('model', help='ETABS model (.EDB) to open, or exported drift tables (.xlsx, .csv, .mdb)')
+    parser.add_argument('--joint-table', default=None, help='exported joint drifts table, if not in the model file')
+    parser.add_argument('-o', '--output', default=None, help='.xlsx, .csv, .parquet or .feather file to write, prints top rows if omitted')
+    parser.add_argument('--top', type=int, default=None, help='only keep the top governing results')
+    parser.add_argument('--per', choices=['Direction', 'Story'], default=None, help='pick top results per group')
+    parser.add_argument('--envelope', action='store_true', help='only the governing combo of each story and direction')
+    parser.add_argument('--cache', action='store_true', help='reuse results cached from earlier runs')
+    parser.add_argument('--cache-dir', default=None, help='results cache directory')
+    parser.add_argument('--pipeline', type=int, default=None, metavar='COMBOS',
+                        help='read results COMBOS drift combos at a time while earlier combos are processed')
+    parser.add_argument('--reduce-joints', action='store_true',
+                        help='only read the diaphragm joints that set torsion ratios (rigid diaphragms)')
+    parser.add_argument('--check-analysis', action='store_true', help='skip analysis if the model has results')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print progress messages')
+    add_timing_argument(parser)
+
+
+def limit_argument(text):
+    # dict of drift limits of a --story-limit or --combo-limit argument
+    from etabs_results import parse_limits
+
+    try:
+        return parse_limits(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_limit_arguments(parser):
+    parser.add_argument('-l', '--limit', type=float, default=0.01, help='drift limit')
+    parser.add_argument('--story-limit', type=limit_argument, action='append', default=[], metavar='STORY=LIMIT',
+                        help='drift limit of a story, e.g. "Roof=0.02", may be repeated')
+    parser.add_argument('--combo-limit', type=limit_argument, action='append', default=[], metavar='COMBO=LIMIT',
+                        help='drift limit of a combo, the smaller limit governs where a story limit also applies')
+
+
+def add_timing_argument(parser):
+    parser.add_argument('--timing', nargs='?', const='-', default=None, metavar='FILE',
+                        help='write a JSON timing report of each stage to FILE, or to stderr')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='drift_cli', description='ETABS story drift and torsion checks')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    drift = subparsers.add_parser('drift', help='story drift check of one model')
+    add_model_arguments(drift)
+    add_limit_arguments(drift)
+    drift.set_defaults(func=run_drift)
+
+    torsion = subparsers.add_parser('torsion', help='torsion check of one model')
+    add_model_arguments(torsion)
+    torsion.set_defaults(func=run_torsion)
+
+    reformat = subparsers.add_parser('reformat', help='sort story drift tables exported from ETABS')
+    reformat.add_argument('files', nargs='+', help='exported .xlsx story drift tables, directories or glob patterns')
+    reformat.add_argument('--stream', action='store_true', help='stream rows of very large exports')
+    reformat.add_argument('-w', '--workers', type=int, default=2, help='number of files to reformat at once')
+    reformat.add_argument('-s', '--summary', default=None,
+                          help='summary workbook of governing DCRs when reformatting many files')
+    add_timing_argument(reformat)
+    reformat.set_defaults(func=run_reformat)
+
+    sweep = subparsers.add_parser('sweep', help='check every model in a directory')
+    sweep.add_argument('models', help='directory of .EDB models or glob pattern')
+    sweep.add_argument('-o', '--output', default=None, help='comparison workbook to write')
+    sweep.add_argument('-f', '--format', choices=['parquet', 'feather', 'excel'], default='parquet',
+                       help='file format of the full results, excel writes every row to the workbook')
+    add_limit_arguments(sweep)
+    sweep.add_argument('-w', '--workers', type=int, default=2, help='number of ETABS instances to run at once')
+    sweep.set_defaults(func=run_sweep)
+
+    args = parser.parse_args(argv)
+    if getattr(args, 'top', None) is not None and args.top < 1:
+        parser.error('--top must be at least 1')
+    if getattr(args, 'per', None) is not None and getattr(args, 'top', None) is None:
+        parser.error('--per picks the top rows of each group, give --top as well')
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
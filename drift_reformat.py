@@ -0,0 +1,288 @@
+# reformatting of story drift tables exported from ETABS, usable without PyQt5
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook, Workbook
+from openpyxl.utils import get_column_letter
+from stage_timer import timer_stage
+
+# xlsx package names of the parts changed when a sheet is appended
+CONTENT_TYPES = '[Content_Types].xml'
+WORKBOOK = 'xl/workbook.xml'
+WORKBOOK_RELS = 'xl/_rels/workbook.xml.rels'
+WORKSHEET_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+WORKSHEET_CONTENT = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+
+
+def reformat_drift_table(inFileName = 'Book1.xlsx', stream = False, timer = None):
+    # function to reformat story drift spreadsheet created by etabs
+    # stream = True reads the export row by row for very large files, see stream_drift_table
+    # timer is an optional stage_timer.StageTimer recording the time of each step
+    if stream:
+        return stream_drift_table(inFileName, timer = timer)
+
+    dfSort = sort_drift_table(inFileName, 0, timer)
+
+    # add sorted data to new sheet
+    write_sorted_sheets(inFileName, {'Drift Sorted': dfSort}, timer)
+
+    return 'reformatting complete'
+
+
+def sort_drift_table(inFileName, sheetName = 0, timer = None):
+    # drift combo rows of one sheet of an etabs export with initial excel row and DCR columns, largest DCR first
+    with timer_stage(timer, 'read export'):
+        ofile = pd.read_excel(inFileName, sheet_name = sheetName, header = 1)
+    
+    # remove first and third row which are etabs titles
+    delete_rows = [0, 2]
+    rmvTitleRows = ofile.drop(delete_rows) 
+    
+    # insert initial excel row number
+    excelRow = rmvTitleRows.index + len(delete_rows) + 1
+    rmvTitleRows.insert(0,'Initial Row', excelRow, True)
+    
+    # filter for only rows that contain drift combos
+    with timer_stage(timer, 'filter drift rows'):
+        driftRows = rmvTitleRows.loc[rmvTitleRows['Load Case/Combo'].str.contains('drift', case = False)]
+    if timer is not None:
+        timer.add_rows('drift rows', driftRows['Load Case/Combo'])
+        
+    # calculate story drift DCR
+    maxDrift = 0.01
+    dcrSeries = driftRows['Drift'] / maxDrift
+    
+    # insert DCR column and sort largest to smallest
+    with timer_stage(timer, 'sort'):
+        driftRows.insert(len(driftRows.columns), 'DCR', dcrSeries, True)
+        dfSort = driftRows.sort_values(by=['DCR'], ascending = False)
+    # print(dfSort.head())
+    return dfSort
+
+
+def write_sorted_sheets(inFileName, sortedTables, timer = None):
+    # add each sorted table of sortedTables (sheet name: table) to the export, replacing sheets of the same name
+    # the sheets are appended to the xlsx package directly, existing sheets are not read or written again
+    with timer_stage(timer, 'write sheet'):
+        append_sheets(inFileName, sortedTables)
+
+
+def xml_attributes(element):
+    # attributes of one xml start tag as a dict
+    return dict(re.findall(r'([\w:]+)="([^"]*)"', element))
+
+
+def sheet_xml(dfSort, rowsPerChunk = 5000):
+    # worksheet xml of a table with its index in column A and column titles on row 1, in chunks of rows
+    # text is written as inline strings so the workbook's shared strings are left as they are
+    letters = [get_column_letter(i + 1) for i in range(len(dfSort.columns) + 1)]
+
+    def cell(letter, rowNumber, value):
+        if value is None or value != value:  # empty and nan cells are left out
+            return ''
+        if isinstance(value, (bool, np.bool_)):
+            return '<c r="%s%d" t="b"><v>%d</v></c>' % (letter, rowNumber, value)
+        if isinstance(value, (float, np.floating)):
+            # infinite values, e.g. ratios of zero average displacement, have no xml number form and are left out
+            if not np.isfinite(value):
+                return ''
+            return '<c r="%s%d"><v>%r</v></c>' % (letter, rowNumber, float(value))
+        if isinstance(value, (int, np.integer)):
+            return '<c r="%s%d"><v>%d</v></c>' % (letter, rowNumber, value)
+        return '<c r="%s%d" t="inlineStr"><is><t>%s</t></is></c>' % (letter, rowNumber, escape(str(value)))
+
+    yield ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+           '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+    titles = [None] + [str(name) for name in dfSort.columns]
+    yield '<row r="1">%s</row>' % ''.join(cell(letter, 1, title) for letter, title in zip(letters, titles))
+    columns = [dfSort.index.tolist()] + [dfSort[name].tolist() for name in dfSort.columns]
+    chunk = []
+    for rowNumber, row in enumerate(zip(*columns), 2):
+        chunk.append('<row r="%d">%s</row>' % (rowNumber, ''.join(cell(letter, rowNumber, value)
+                                                                 for letter, value in zip(letters, row))))
+        if len(chunk) == rowsPerChunk:
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk) + '</sheetData></worksheet>'
+
+
+def append_sheets(inFileName, sortedTables):
+    # append worksheets to an xlsx file at the zip level: new sheet parts are added after the existing entries
+    # and only the workbook, its relationships and the content types are rewritten, existing sheet data is
+    # never read, a replaced sheet's old part is dropped from the zip directory and left unreferenced
+    with zipfile.ZipFile(inFileName, 'a', zipfile.ZIP_DEFLATED) as book:
+        names = set(book.namelist())
+        workbook = book.read(WORKBOOK).decode('utf-8')
+        rels = book.read(WORKBOOK_RELS).decode('utf-8')
+        types = book.read(CONTENT_TYPES).decode('utf-8')
+        sheets = [xml_attributes(element) for element in re.findall(r'<sheet\s[^>]*>', workbook)]
+        targets = {attributes.get('Id'): attributes.get('Target')
+                   for attributes in map(xml_attributes, re.findall(r'<Relationship\s[^>]*>', rels))}
+        dropped = []
+
+        for sheetName, dfSort in sortedTables.items():
+            partNumber = 1
+            while 'xl/worksheets/sheet%d.xml' % partNumber in names:
+                partNumber += 1
+            partName = 'xl/worksheets/sheet%d.xml' % partNumber
+            names.add(partName)
+            with book.open(partName, 'w', force_zip64 = True) as part:
+                for text in sheet_xml(dfSort):
+                    part.write(text.encode('utf-8'))
+            types = types.replace('</Types>', '<Override PartName="/%s" ContentType="%s"/></Types>'
+                                  % (partName, WORKSHEET_CONTENT))
+
+            existing = [attributes for attributes in sheets if attributes.get('name') == escape(sheetName)]
+            if existing:
+                # point the sheet's relationship at the new part
+                relId = existing[0].get('r:id')
+                oldTarget = targets[relId]
+                dropped.append(oldTarget.lstrip('/') if oldTarget.startswith('/') else 'xl/' + oldTarget)
+                rels = re.sub(r'(<Relationship\s[^>]*Id="%s"[^>]*>)' % re.escape(relId),
+                              lambda match: match.group(1).replace('Target="%s"' % oldTarget, 'Target="/%s"' % partName),
+                              rels)
+                continue
+            relNumber = 1
+            while 'rId%d' % relNumber in targets:
+                relNumber += 1
+            relId = 'rId%d' % relNumber
+            targets[relId] = '/' + partName
+            rels = rels.replace('</Relationships>', '<Relationship Id="%s" Type="%s" Target="/%s"/></Relationships>'
+                                % (relId, WORKSHEET_TYPE, partName))
+            sheetId = max([int(attributes.get('sheetId', 0)) for attributes in sheets] + [0]) + 1
+            sheets.append({'name': escape(sheetName), 'sheetId': str(sheetId), 'r:id': relId})
+            workbook = workbook.replace('</sheets>', '<sheet xmlns:r="http://schemas.openxmlformats.org/officeDocument/'
+                                        '2006/relationships" name=%s sheetId="%d" r:id="%s"/></sheets>'
+                                        % (quoteattr(sheetName), sheetId, relId))
+
+        # replaced parts are dropped from the zip directory, which is written again when the file is closed
+        for name in [WORKBOOK, WORKBOOK_RELS, CONTENT_TYPES] + dropped:
+            info = book.NameToInfo.pop(name, None)
+            if info is not None:
+                book.filelist.remove(info)
+        for name in dropped:
+            types = types.replace('<Override PartName="/%s" ContentType="%s"/>' % (name, WORKSHEET_CONTENT), '')
+        book.writestr(WORKBOOK, workbook)
+        book.writestr(WORKBOOK_RELS, rels)
+        book.writestr(CONTENT_TYPES, types)
+
+
+def drift_sheets(inFileName):
+    # names of the sheets holding an etabs story drift table, found by the column titles on their second row
+    book = load_workbook(inFileName, read_only = True)
+    try:
+        names = []
+        for sheet in book.worksheets:
+            titles = next(sheet.iter_rows(min_row = 2, max_row = 2, values_only = True), ())
+            titles = [str(title) for title in titles]
+            if 'Load Case/Combo' in titles and 'Drift' in titles:
+                names.append(sheet.title)
+        return names
+    finally:
+        book.close()
+
+
+def sorted_sheet_name(sheetName, single = True):
+    # name of the sheet of sorted drifts, 'Drift Sorted' when a workbook has one drift table
+    if single:
+        return 'Drift Sorted'
+    return (sheetName + ' Sorted')[:31]  # excel sheet names have at most 31 characters
+
+
+def reformat_drift_sheets(inFileName, stream = False, timer = None):
+    # reformat every story drift table of a workbook, each gets its own sorted sheet
+    # the sorted sheets are added to the export, or saved to a new workbook next to it when streaming
+    # returns the status message and the sorted tables by sorted sheet name
+    sheets = drift_sheets(inFileName)
+    if not sheets:
+        raise ValueError('no story drift table found in ' + os.path.basename(inFileName))
+    sortedTables = {}
+    for sheetName in sheets:
+        if stream:
+            dfSort = stream_sorted_rows(inFileName, sheetName, timer = timer)
+        else:
+            dfSort = sort_drift_table(inFileName, sheetName, timer)
+        sortedTables[sorted_sheet_name(sheetName, len(sheets) == 1)] = dfSort
+
+    if stream:
+        outFileName = os.path.splitext(inFileName)[0] + ' - Drift Sorted.xlsx'
+        write_sorted_workbook(sortedTables, outFileName, timer)
+        message = 'sorted drifts saved to ' + os.path.basename(outFileName)
+    else:
+        write_sorted_sheets(inFileName, sortedTables, timer)
+        message = 'sorted drifts added as ' + ', '.join(sortedTables)
+    return 'reformatting complete, %s' % message, sortedTables
+
+
+def drift_chunk_frame(rows, rowNumbers, columns, maxDrift = 0.01):
+    # dataframe of one chunk of streamed drift rows with initial excel row and DCR columns
+    chunk = pd.DataFrame.from_records(rows, columns = columns, index = np.asarray(rowNumbers) - 3)
+    chunk.insert(0, 'Initial Row', np.asarray(rowNumbers), True)
+    chunk['DCR'] = pd.to_numeric(chunk['Drift'], errors = 'coerce') / maxDrift
+    return chunk
+
+
+def stream_drift_table(inFileName, outFileName = None, chunkSize = 50000, timer = None):
+    # reformat story drift spreadsheet without loading the whole workbook
+    # the sorted table is written in write-only mode to its own workbook next to the export
+    if outFileName is None:
+        outFileName = os.path.splitext(inFileName)[0] + ' - Drift Sorted.xlsx'
+
+    dfSort = stream_sorted_rows(inFileName, None, chunkSize, timer)
+    write_sorted_workbook({'Drift Sorted': dfSort}, outFileName, timer)
+
+    return 'reformatting complete, sorted drifts saved to ' + os.path.basename(outFileName)
+
+
+def stream_sorted_rows(inFileName, sheetName = None, chunkSize = 50000, timer = None):
+    # drift combo rows of one sheet (the first if no name is given), largest DCR first
+    # rows are read in read-only mode and only drift combo rows are kept, in chunks of chunkSize
+    with timer_stage(timer, 'read export'):
+        book = load_workbook(inFileName, read_only = True)
+        sheet = book.worksheets[0] if sheetName is None else book[sheetName]
+        rowIter = sheet.iter_rows(values_only = True)
+        next(rowIter)  # etabs table title
+        columns = [str(name) for name in next(rowIter)]
+        comboCol = columns.index('Load Case/Combo')
+
+        chunks = []
+        rows = []
+        rowNumbers = []
+        # data rows start on excel row 3, first and third data rows are etabs titles
+        for excelRow, row in enumerate(rowIter, 3):
+            if excelRow in (3, 5):
+                continue
+            combo = row[comboCol]
+            if combo is None or 'drift' not in str(combo).lower():
+                continue
+            rows.append(row[:len(columns)])
+            rowNumbers.append(excelRow)
+            if len(rows) == chunkSize:
+                chunks.append(drift_chunk_frame(rows, rowNumbers, columns))
+                rows = []
+                rowNumbers = []
+        if rows or not chunks:
+            chunks.append(drift_chunk_frame(rows, rowNumbers, columns))
+        book.close()
+
+    with timer_stage(timer, 'sort'):
+        driftRows = pd.concat(chunks)
+        dfSort = driftRows.sort_values(by=['DCR'], ascending = False)
+    if timer is not None:
+        timer.add_rows('drift rows', driftRows['Load Case/Combo'])
+    return dfSort
+
+
+def write_sorted_workbook(sortedTables, outFileName, timer = None):
+    # new workbook with a sheet for each sorted table of sortedTables (sheet name: table), written row by row
+    with timer_stage(timer, 'write sheet'):
+        outBook = Workbook(write_only = True)
+        for sheetName, dfSort in sortedTables.items():
+            outSheet = outBook.create_sheet(sheetName)
+            outSheet.append([None] + list(dfSort.columns))
+            for index, row in zip(dfSort.index, dfSort.itertuples(index = False, name = None)):
+                outSheet.append([index] + [None if pd.isna(value) else value for value in row])
+        outBook.save(outFileName)
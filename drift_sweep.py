@@ -0,0 +1,121 @@
+# headless drift and torsion check of many ETABS model variants using a pool of worker processes
+# each worker opens, analyzes and checks one model at a time with its own ETABS instance
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from etabs_results import EtabsModel, drift_sort_column, torsion_envelope_table
+from results_export import COLUMNAR_FORMATS, check_columnar, export_results
+
+
+def find_models(pattern):
+    # list of model files in a directory, or matching a glob pattern
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.EDB')
+    return sorted(glob.glob(pattern))
+
+
+def check_model(modelpath, dlimit=0.01, modelfactory=EtabsModel):
+    # open one model and return its drift and torsion results and their envelopes of each story and direction,
+    # all with a model column, envelopes are taken from the unrounded results of the model
+    model = modelfactory(modelpath)
+    try:
+        drifts = model.story_drift_results(dlimit)
+        driftEnvelope = model.story_drift_results(dlimit, envelope=True)
+        torsion = model.story_torsion_check()
+        torsEnvelope = torsion_envelope_table(model.TorsionRatios, model.TorsionIndex)
+    finally:
+        model.model_close()
+    tables = (drifts, torsion, driftEnvelope, torsEnvelope)
+    for table in tables:
+        table.insert(0, 'Model', model.modelName)
+    return tables
+
+
+def sweep_model(modelpath, dlimit=0.01, modelfactory=EtabsModel):
+    # check one model in a worker process, returns (status, results of check_model or None, seconds)
+    # errors are reported in the status, including the sys.exit of a program that cannot be started
+    start = time.perf_counter()
+    try:
+        results = check_model(modelpath, dlimit, modelfactory)
+    except (Exception, SystemExit) as e:
+        return 'failed: %s' % (str(e) or type(e).__name__), None, time.perf_counter() - start
+    return 'checked', results, time.perf_counter() - start
+
+
+def sweep_models(pattern, outpath=None, dlimit=0.01, workers=2, modelfactory=EtabsModel, fmt='parquet',
+                 summary=True):
+    # check every model found for pattern across at most workers processes
+    # merged results are written to parquet (or feather) files with a comparison workbook of the governing rows,
+    # or to one workbook of all rows if fmt is None, both with a 'models' table of the status of each model
+    # a model that fails is left out of the results, returns merged drift and torsion frames and the status table
+    modelpaths = find_models(pattern)
+    if not modelpaths:
+        raise FileNotFoundError('no models found for ' + pattern)
+    check_columnar(fmt)  # before any model is checked, as results could not be written
+
+    outcomes = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(sweep_model, path, dlimit, modelfactory) for path in modelpaths]
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                # the worker process itself stopped, e.g. when ETABS crashed it
+                outcomes.append(('failed: %s' % (str(e) or type(e).__name__), None, 0.0))
+
+    statusTable = pd.DataFrame({'Model': [os.path.basename(path) for path in modelpaths],
+                                'Status': [status for status, results, seconds in outcomes],
+                                'Seconds': [round(seconds, 2) for status, results, seconds in outcomes]})
+    results = [results for status, results, seconds in outcomes if results is not None]
+    if not results:
+        raise RuntimeError('no model could be checked, first error: ' + outcomes[0][0])
+
+    driftTable, torsTable, driftEnvelope, torsEnvelope = [pd.concat(tables, ignore_index=True)
+                                                          for tables in zip(*results)]
+    # sorted by DCR where limits differ between rows, like the drift table of each model
+    driftTable = driftTable.sort_values(by=[drift_sort_column(driftTable)], ascending=False)
+    torsTable = torsTable.sort_values(by=['Ratio'], ascending=False)
+
+    if outpath is None:
+        outpath = os.path.join(os.path.dirname(modelpaths[0]), 'sweep_results.xlsx')
+    if fmt is None:
+        with pd.ExcelWriter(outpath) as writer:
+            driftTable.to_excel(writer, sheet_name='drift_results')
+            torsTable.to_excel(writer, sheet_name='torsion_results')
+            statusTable.to_excel(writer, sheet_name='models', index=False)
+    else:
+        # envelope of each model, story and direction for the comparison workbook
+        tables = {'drift_envelope': driftEnvelope, 'torsion_envelope': torsEnvelope,
+                  'drift': driftTable, 'torsion': torsTable, 'models': statusTable}
+        export_results(os.path.splitext(outpath)[0], '', tables, fmt, summary)
+
+    return driftTable, torsTable, statusTable
+
+
+def print_status(statusTable):
+    # models that failed and the number checked
+    for model, status in zip(statusTable['Model'], statusTable['Status']):
+        if status != 'checked':
+            print(model + ': ' + status)
+    print('checked %d of %d models' % ((statusTable['Status'] == 'checked').sum(), len(statusTable)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check drift and torsion of every ETABS model in a directory')
+    parser.add_argument('models', help='directory of .EDB models or glob pattern')
+    parser.add_argument('-o', '--output', default=None, help='comparison workbook to write')
+    parser.add_argument('-f', '--format', choices=list(COLUMNAR_FORMATS) + ['excel'], default='parquet',
+                        help='file format of the full results, excel writes every row to the workbook')
+    parser.add_argument('-l', '--limit', type=float, default=0.01, help='drift limit')
+    parser.add_argument('-w', '--workers', type=int, default=2, help='number of ETABS instances to run at once')
+    args = parser.parse_args()
+    fmt = None if args.format == 'excel' else args.format
+    driftTable, torsTable, statusTable = sweep_models(args.models, args.output, args.limit, args.workers, fmt=fmt)
+    print_status(statusTable)
+
+
+if __name__ == '__main__':
+    main()
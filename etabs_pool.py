@@ -0,0 +1,90 @@
+# pool of started ETABS programs, so opening another model does not start ETABS again
+# EtabsModel(..., pool=pool) takes a program from the pool and gives it back when the model is closed
+# COM objects belong to the thread that created them, a pool is used only from the thread it was created on
+import time
+from etabs_results import start_etabs
+
+
+class PoolExhausted(Exception):
+    # raised by acquire when maxsize programs are already in use
+    pass
+
+
+class EtabsInstancePool:
+    # keeps up to maxsize programs, programs idle for more than idletimeout seconds are exited
+    # factory is called with no arguments to start a program, start_etabs is used if no factory is given
+    def __init__(self, factory=None, maxsize=1, idletimeout=600.0, programpath=None, clock=time.monotonic):
+        self.Factory = factory if factory is not None else (lambda: start_etabs(programpath))
+        self.MaxSize = maxsize
+        self.IdleTimeout = idletimeout
+        self.Clock = clock
+        self.Idle = []  # (program, time it was released), most recently released last
+        self.Busy = []
+        self.Started = 0
+        self.Reused = 0
+
+    def size(self):
+        # number of programs running, idle or in use
+        return len(self.Idle) + len(self.Busy)
+
+    def is_healthy(self, program):
+        # a program that crashed or was closed by the user fails the first API call made to it
+        try:
+            program.SapModel.GetModelFilename()
+        except Exception:
+            return False
+        return True
+
+    def exit_program(self, program):
+        # close program without saving, a program that already stopped is only dropped
+        try:
+            program.ApplicationExit(False)
+        except Exception:
+            pass
+
+    def acquire(self):
+        # healthy idle program if there is one, otherwise a newly started program
+        self.evict_idle()
+        while self.Idle:
+            program, released = self.Idle.pop()
+            if self.is_healthy(program):
+                self.Busy.append(program)
+                self.Reused += 1
+                return program
+            self.exit_program(program)
+        if self.size() >= self.MaxSize:
+            raise PoolExhausted('all %d ETABS instances are in use' % self.MaxSize)
+        program = self.Factory()
+        self.Started += 1
+        self.Busy.append(program)
+        return program
+
+    def release(self, program):
+        # give program back to be reused, it is exited instead if it stopped responding
+        if program in self.Busy:
+            self.Busy.remove(program)
+        if self.is_healthy(program):
+            self.Idle.append((program, self.Clock()))
+        else:
+            self.exit_program(program)
+        self.evict_idle()
+
+    def evict_idle(self):
+        # exit programs idle for longer than IdleTimeout, returns the number exited
+        now = self.Clock()
+        keep = [(program, released) for program, released in self.Idle if now - released <= self.IdleTimeout]
+        for program, released in self.Idle:
+            if now - released > self.IdleTimeout:
+                self.exit_program(program)
+        evicted = len(self.Idle) - len(keep)
+        self.Idle = keep
+        return evicted
+
+    def close(self):
+        # exit every program, programs still in use are exited too
+        for program, released in self.Idle:
+            self.exit_program(program)
+        for program in self.Busy:
+            self.exit_program(program)
+        self.Idle = []
+        self.Busy = []
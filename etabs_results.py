@@ -0,0 +1,814 @@
+# headless core of the drift and torsion check tool, no PyQt5 or comtypes import is needed to use it
+# comtypes is only imported when EtabsModel starts or attaches to ETABS
+import hashlib
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from joint_index import JointIndex
+from results_backends import ComResultsBackend
+from stage_timer import ComCallCounter, timed, timer_stage
+
+
+def is_number(s):
+    # funtion to test if a string input is a number
+    # https://stackoverflow.com/questions/354038/how-do-i-check-if-a-string-is-a-number-float
+    try:
+        float(s)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_limits(text):
+    # dict of drift limits from text like "Story1=0.015, Roof=0.02", raises ValueError if a limit is not a number
+    limits = {}
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        name, equals, limit = item.rpartition('=')
+        if not equals or not name.strip() or not is_number(limit):
+            raise ValueError('drift limits must be given as name=limit, not "%s"' % item.strip())
+        limits[name.strip()] = float(limit)
+    return limits
+
+
+def results_frame(arrays, floatcolumns, combos):
+    # builds a dataframe from result arrays returned by ETABS without making a tuple per row
+    # arrays maps column name to the list of arrays returned by each results call
+    # number columns become float64 and text columns become categoricals, 'Combo' rows not in combos are dropped
+    data = {}
+    for name, parts in arrays.items():
+        if name in floatcolumns:
+            data[name] = np.concatenate([np.asarray(part, dtype=np.float64) for part in parts] or [np.empty(0)])
+            continue
+        values = np.concatenate([np.asarray(part, dtype=object) for part in parts] or [np.empty(0, dtype=object)])
+        if name == 'Combo':
+            data[name] = pd.Categorical(values, categories=combos)
+        else:
+            codes, uniques = pd.factorize(values)
+            data[name] = pd.Categorical.from_codes(codes, uniques)
+    df = pd.DataFrame(data, columns=list(arrays))
+    if 'Combo' in arrays:
+        df = df[df['Combo'].notna()].reset_index(drop=True)
+    return df
+
+
+def story_torsion_table(jdf):
+    # returns max, avg, and ratio of story displacements for every story and combo in joint dataframe
+    # grouped in a single pass instead of filtering the joint dataframe once per story and combo
+    # joints reduced by a joint_index.JointIndex have a 'Weight' column, the average is then a weighted mean
+    absdf = jdf.assign(AbsX=jdf['DispX'].abs(), AbsY=jdf['DispY'].abs())
+    if 'Weight' in jdf.columns:
+        absdf = absdf.assign(SumX=jdf['DispX'] * jdf['Weight'], SumY=jdf['DispY'] * jdf['Weight'])
+        grouped = absdf.groupby(['Story', 'Combo'], sort=False, observed=True)
+        gdf = grouped.agg(MaxX=('AbsX', 'max'), MaxY=('AbsY', 'max'), SumX=('SumX', 'sum'), SumY=('SumY', 'sum'),
+                          Weight=('Weight', 'sum'))
+        gdf['AvgX'] = gdf['SumX'] / gdf['Weight']
+        gdf['AvgY'] = gdf['SumY'] / gdf['Weight']
+    else:
+        grouped = absdf.groupby(['Story', 'Combo'], sort=False, observed=True)
+        gdf = grouped.agg(MaxX=('AbsX', 'max'), MaxY=('AbsY', 'max'), AvgX=('DispX', 'mean'), AvgY=('DispY', 'mean'))
+    averagex = gdf['AvgX'].abs()
+    averagey = gdf['AvgY'].abs()
+
+    # assume direction is X, change direction to Y if avg y-dir displacement is higher
+    useY = averagey > averagex
+    averaged = averagey.where(useY, averagex)
+    maximumd = gdf['MaxY'].where(useY, gdf['MaxX'])
+
+    tlabels = ['Story', 'Load Combo', 'Direction', 'Max Displ', 'Avg Displ', 'Ratio']
+    tdf = pd.DataFrame({'Story': gdf.index.get_level_values('Story'),
+                        'Load Combo': gdf.index.get_level_values('Combo'),
+                        'Direction': useY.map({True: 'Y', False: 'X'}).to_numpy(),
+                        'Max Displ': maximumd.to_numpy(),
+                        'Avg Displ': averaged.to_numpy(),
+                        'Ratio': (maximumd / averaged).to_numpy()}, columns=tlabels)
+    return tdf
+
+
+def concat_results(frames):
+    # joins results frames keeping categorical columns categorical
+    data = {}
+    for name in frames[0].columns:
+        if isinstance(frames[0][name].dtype, pd.CategoricalDtype):
+            data[name] = union_categoricals([frame[name] for frame in frames])
+        else:
+            data[name] = np.concatenate([frame[name].to_numpy() for frame in frames])
+    return pd.DataFrame(data, columns=frames[0].columns)
+
+
+def combo_fingerprints(df):
+    # sha1 of the result rows of each combo, used to find combos whose results changed
+    rowHashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    fingerprints = {}
+    for combo, rows in df.groupby('Combo', sort=False, observed=True).indices.items():
+        fingerprints[combo] = hashlib.sha1(rowHashes[rows].tobytes()).hexdigest()
+    return fingerprints
+
+
+def drift_delta_table(oldDrifts, newDrifts, oldLimit=0.01, newLimit=0.01):
+    # old and new drift DCR of each story, combo and direction, sorted by largest change
+    keys = ['Story', 'Combo', 'Direction']
+    old = pd.DataFrame({key: oldDrifts[key].astype(str) for key in keys})
+    old['Old DCR'] = oldDrifts['Drift'].to_numpy() / limit_values(oldDrifts, oldLimit)
+    new = pd.DataFrame({key: newDrifts[key].astype(str) for key in keys})
+    new['New DCR'] = newDrifts['Drift'].to_numpy() / limit_values(newDrifts, newLimit)
+    delta = old.merge(new, on=keys, how='outer')
+    delta['Change'] = delta['New DCR'] - delta['Old DCR']
+    delta = delta.iloc[np.argsort(-delta['Change'].abs().to_numpy(), kind='stable')]
+    return delta.round({'Old DCR': 2, 'New DCR': 2, 'Change': 2})
+
+
+def top_rows(df, column, n, per=None):
+    # returns the n rows with largest values of column, or the n largest in each group of per column
+    # rows are picked by partial selection and only the picked rows are sorted
+    values = df[column].to_numpy()
+    if per is None:
+        groups = [np.arange(len(df))]
+    else:
+        groups = df.groupby(per, sort=False, observed=True).indices.values()
+    picked = []
+    for rows in groups:
+        if n < len(rows):
+            rows = rows[np.argpartition(-values[rows], n - 1)[:n]]
+        picked.append(rows)
+    df = df.iloc[np.concatenate(picked)] if picked else df
+    return df.sort_values(by=[column], ascending=False)
+
+
+class DriftLimits:
+    # drift limit of each story drift row, e.g. by occupancy or story height, given instead of one drift limit
+    # stories and combos map story or combo names to their limit, default is used for rows of neither
+    # where a story limit and a combo limit both apply the smaller one governs
+    def __init__(self, default=0.01, stories=None, combos=None):
+        self.Default = float(default)
+        self.Stories = dict(stories or {})
+        self.Combos = dict(combos or {})
+
+    def __str__(self):
+        overrides = len(self.Stories) + len(self.Combos)
+        return str(self.Default) + (' (%d story or combo limits)' % overrides if overrides else '')
+
+    def uniform(self):
+        return not self.Stories and not self.Combos
+
+    def values(self, df, combocolumn='Combo'):
+        # limit of each row of df, looked up once per distinct story and combo name
+        storyLimits = self.column_limits(df['Story'], self.Stories)
+        comboLimits = self.column_limits(df[combocolumn], self.Combos)
+        limits = np.fmin(storyLimits, comboLimits)
+        return np.where(np.isnan(limits), self.Default, limits)
+
+    def column_limits(self, column, limits):
+        # limit of each row of a story or combo column, nan for rows without one
+        if not limits:
+            return np.full(len(column), np.nan)
+        codes, names = pd.factorize(column)
+        return np.array([limits.get(str(name), np.nan) for name in names] + [np.nan])[codes]
+
+
+def limit_values(df, dlimit):
+    # drift limit of each row of df for a DriftLimits, or the drift limit if it is a number
+    if isinstance(dlimit, DriftLimits):
+        return dlimit.Default if dlimit.uniform() else dlimit.values(df)
+    return dlimit
+
+
+def drift_dcr(storyDrifts, dlimit):
+    # story drifts with a DCR column, and the limit of each row if not all rows have the same limit
+    limits = limit_values(storyDrifts, dlimit)
+    df = storyDrifts.assign(**{'DCR(Drift/Limit)': storyDrifts['Drift'] / limits})
+    if not np.isscalar(limits):
+        df.insert(len(df.columns) - 1, 'Drift Limit', limits)
+    return df
+
+
+def drift_sort_column(df):
+    # column governing drift rows, DCR where rows have limits of their own as drifts are then not comparable
+    return 'Drift' if 'Drift Limit' not in df.columns else 'DCR(Drift/Limit)'
+
+
+def drift_results_table(storyDrifts, dlimit=0.01, top=None, per=None):
+    # drift results with DCR sorted by drift column, only the top governing rows if top is given
+    # dlimit may be a DriftLimits, rows are then sorted by DCR as limits differ between rows
+    df = drift_dcr(storyDrifts, dlimit)
+    column = drift_sort_column(df)
+    if top:
+        dfSort = top_rows(df, column, top, per)
+    else:
+        dfSort = df.sort_values(by=[column], ascending=False)
+    dfSort.Drift = dfSort.Drift.round(4)
+    dfSort['DCR(Drift/Limit)'] = dfSort['DCR(Drift/Limit)'].round(2)
+    return dfSort
+
+
+def torsion_results_table(torsionRatios, top=None, per=None):
+    # torsion results sorted by ratio column, only the top governing rows if top is given
+    if top:
+        tdfSort = top_rows(torsionRatios, 'Ratio', top, per)
+    else:
+        tdfSort = torsionRatios.sort_values(by=['Ratio'], ascending=False)
+    tdfSort.Ratio = tdfSort.Ratio.round(3)
+    tdfSort['Max Displ'] = tdfSort['Max Displ'].round(3)
+    tdfSort['Avg Displ'] = tdfSort['Avg Displ'].round(3)
+    return tdfSort
+
+
+def split_groups(codes):
+    # (code, sorted row positions) of each code of an integer array in order of first appearance, -1 is skipped
+    order = np.argsort(codes, kind='stable')
+    sortedCodes = codes[order]
+    starts = np.flatnonzero(np.diff(sortedCodes)) + 1
+    groups = [(sortedCodes[part[0]], order[part[0]:part[1]])
+              for part in zip(np.r_[0, starts], np.r_[starts, len(codes)]) if part[1] > part[0]]
+    groups = [(code, rows) for code, rows in groups if code >= 0]
+    groups.sort(key=lambda group: group[1][0])
+    return groups
+
+
+def group_maxima(codes, shape, values):
+    # position of the row with the largest value in each group of combined label codes, ties go to the first row
+    # found in one maximum and one minimum pass without sorting, rows with a missing label or value are left out
+    # groups are in order of their labels first appearing, e.g. stories in the order ETABS lists them
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    for keyCodes in codes:
+        valid &= keyCodes >= 0
+    group = np.ravel_multi_index(codes, shape, mode='clip')
+    ngroups = int(np.prod(shape))
+
+    best = np.full(ngroups, -np.inf)
+    np.maximum.at(best, group[valid], values[valid])
+    hit = np.flatnonzero(valid & (values == best[group]))
+    first = np.full(ngroups, len(values))
+    np.minimum.at(first, group[hit], hit)
+    return first[first < len(values)]
+
+
+class ResultsIndex:
+    # row positions of a results frame keyed by story, combo and direction, built once after extraction
+    # so drill-down queries and per-story or per-combo envelopes are lookups instead of filtering the frame
+    # combocolumn is the frame column holding combo names, e.g. 'Load Combo' of torsion ratios
+    keys = ('Story', 'Combo', 'Direction')
+    empty = np.empty(0, dtype=np.intp)
+
+    def __init__(self, df, combocolumn='Combo'):
+        self.Columns = {'Story': 'Story', 'Combo': combocolumn, 'Direction': 'Direction'}
+        self.Keys = [key for key in self.keys if self.Columns[key] in df.columns]
+        self.Length = len(df)
+        # rows of each label of one key, and rows of each (story, combo, direction) cell
+        # groups are split from one stable argsort of label codes, rows with a missing label are left out
+        codes = []
+        labels = []
+        self.Groups = {}
+        self.Codes = {}
+        for key in self.Keys:
+            keyCodes, keyLabels = pd.factorize(df[self.Columns[key]])
+            keyLabels = keyLabels.tolist()
+            codes.append(keyCodes)
+            labels.append(keyLabels)
+            self.Codes[key] = keyCodes
+            self.Groups[key] = {keyLabels[code]: rows for code, rows in split_groups(keyCodes)}
+        self.Cells = {}
+        if self.Keys:
+            shape = [max(len(keyLabels), 1) for keyLabels in labels]
+            cellCodes = np.ravel_multi_index(codes, shape, mode='clip')
+            cellCodes[np.any(np.array(codes) < 0, axis=0)] = -1
+            groups = split_groups(cellCodes)
+            cells = np.unravel_index(np.array([code for code, rows in groups], dtype=np.intp), shape)
+            for cell, (code, rows) in zip(zip(*[part.tolist() for part in cells]), groups):
+                self.Cells[tuple(keyLabels[i] for keyLabels, i in zip(labels, cell))] = rows
+
+    def labels(self, key):
+        # labels of key ('Story', 'Combo' or 'Direction') in the order they appear in the frame
+        return list(self.Groups.get(key, ()))
+
+    def rows(self, story=None, combo=None, direction=None):
+        # sorted positions of rows matching the values given, None matches any value
+        selection = {'Story': story, 'Combo': combo, 'Direction': direction}
+        values = [selection[key] for key in self.Keys]
+        if None not in values:
+            return self.Cells.get(tuple(values), self.empty)
+        rows = None
+        for key, value in zip(self.Keys, values):
+            if value is None:
+                continue
+            found = self.Groups[key].get(value, self.empty)
+            rows = found if rows is None else np.intersect1d(rows, found, assume_unique=True)
+        return np.arange(self.Length) if rows is None else rows
+
+    def governing(self, values, by='Story'):
+        # position of the row with the largest value in each group of by, a key or list of keys
+        # e.g. by=['Story', 'Direction'] gives the governing combo of each story and direction
+        by = [by] if isinstance(by, str) else list(by)
+        return group_maxima([self.Codes[key] for key in by], [max(len(self.Groups[key]), 1) for key in by], values)
+
+
+def start_etabs(programpath=None):
+    # start a new instance of ETABS and return the ETABS object, from programpath if given
+    # otherwise the latest installed version of ETABS will be launched
+    import comtypes.client  # only needed to start or attach to ETABS
+
+    # create API helper object
+    helper = comtypes.client.CreateObject('ETABSv17.Helper')
+    helper = helper.QueryInterface(comtypes.gen.ETABSv17.cHelper)
+    if programpath is not None:
+        try:
+            # 'create an instance of the ETABS object from the specified path
+            etabsObject = helper.CreateObject(programpath)
+        except (OSError, comtypes.COMError):
+            print("Cannot start a new instance of the program from " + programpath)
+            sys.exit(-1)
+    else:
+        try:
+            # create an instance of the ETABS object from the latest installed ETABS
+            etabsObject = helper.CreateObjectProgID("CSI.ETABS.API.ETABSObject")
+        except (OSError, comtypes.COMError):
+            print("Cannot start a new instance of the program.")
+            sys.exit(-1)
+
+    # start ETABS application
+    etabsObject.ApplicationStart()
+    return etabsObject
+
+
+def drift_envelope_table(storyDrifts, dlimit=0.01, index=None):
+    # largest drift and DCR of each story and direction with the governing combo
+    # with a DriftLimits the governing combo is the one of largest DCR
+    # index is the ResultsIndex of storyDrifts if one was built already
+    df = drift_dcr(storyDrifts, dlimit)
+    index = index if index is not None else ResultsIndex(df)
+    df = df.iloc[index.governing(df[drift_sort_column(df)].to_numpy(), ['Story', 'Direction'])]
+    df.Drift = df.Drift.round(4)
+    df['DCR(Drift/Limit)'] = df['DCR(Drift/Limit)'].round(2)
+    return df
+
+
+def torsion_envelope_table(torsionRatios, index=None):
+    # largest torsion ratio of each story and direction with the governing combo
+    index = index if index is not None else ResultsIndex(torsionRatios, 'Load Combo')
+    df = torsionRatios.iloc[index.governing(torsionRatios['Ratio'].to_numpy(), ['Story', 'Direction'])]
+    return df.round({'Ratio': 3, 'Max Displ': 3, 'Avg Displ': 3})
+
+
+class ExtractionCancelled(Exception):
+    # raised from a progress callback to stop a model open or results extraction
+    pass
+
+
+class EtabsModel:
+    # my ETABS API class to open and manipulate etabs model
+    def __init__(self, modelpath, etabspath="C:/Program Files/Computers and Structures/ETABS 17/ETABS.exe", existinstance=False, specprogpath=False,
+                 batchresults=True, sapmodel=None, cache=None, checkanalysis=False, progress=None, backend=None,
+                 pool=None, timer=None, pipeline=None, reducejoints=False):
+        # set the following flag to True to attach to an existing instance of the program
+        # otherwise a new instance of the program will be started
+        self.AttachToInstance = existinstance
+
+        # set the following flag to True to manually specify the path to ETABS.exe
+        # this allows for a connection to a version of ETABS other than the latest installation
+        # otherwise the latest installed version of ETABS will be launched
+        self.SpecifyPath = specprogpath
+
+        # if the above flag is set to True, specify the path to ETABS below
+        self.ProgramPath = etabspath
+
+        # etabs_pool.EtabsInstancePool to open the model in an already started program instead of starting one
+        # the program is given back to the pool and kept running when the model is closed
+        self.Pool = pool
+
+        # set the following flag to False to request results from ETABS one drift combo at a time
+        # otherwise all drift combos are selected together and read with one call per result type
+        self.BatchResults = batchresults
+
+        # results_cache.ResultsCache to reuse results from an earlier session on the unchanged model
+        # analysis is then only run when results are not found in the cache
+        self.Cache = cache
+        self.CacheKey = None
+        self.CacheState = None
+
+        # function called with a message at each step of opening and results extraction
+        # it can raise ExtractionCancelled to stop the current step
+        self.Progress = progress
+
+        # stage_timer.StageTimer recording the time of each stage, API calls and result rows per combo
+        self.Timer = timer
+
+        # results_pipeline.ResultsPipeline to read results a few drift combos at a time on this thread while
+        # worker threads convert the combos already read, otherwise results are converted after all are read
+        self.Pipeline = pipeline
+
+        # set the following flag to True to only keep the joints that set torsion ratios, from a joint index of the
+        # model's points built at the first joint results read, otherwise every joint of every story is read
+        self.ReduceJoints = reducejoints
+        self.JointIndex = None
+
+        # set the following flag to True to skip analysis if the model was opened with current analysis results
+        self.CheckAnalysis = checkanalysis
+
+        # full path to the model
+        # set it to the desired path of your model
+        self.FullPath = modelpath
+        [self.modelPath, self.modelName] = os.path.split(self.FullPath)
+        if not os.path.exists(self.modelPath):
+            try:
+                os.makedirs(self.modelPath)
+            except OSError:
+                pass
+
+        if backend is not None:
+            # results are read from the backend given (e.g. results_backends.TableFileBackend), no program is started
+            self.myETABSObject = None
+            self.SapModel = None
+            self.OpenTime = 0.0
+            if backend.Progress is None:
+                backend.Progress = self.report
+        else:
+            self.open_program(sapmodel)
+            backend = ComResultsBackend(self.SapModel, self.BatchResults, self.report)
+        self.Backend = backend
+
+        # get all load combination names
+        with timer_stage(self.Timer, 'combo names'):
+            self.ComboNames = self.Backend.combo_names()
+        self.NumberCombo = len(self.ComboNames)
+
+        # isolate drift combos by searching for "drift" in combo name
+        self.DriftCombos = []
+        for combo in self.ComboNames:
+            lowerCombo = combo.lower()
+            # skip combinations without drift in name
+            if "drift" not in lowerCombo:
+                continue
+            self.DriftCombos.append(combo)
+
+        # run model (this will create the analysis model), deferred until results are needed when using a cache
+        # exported tables already hold analysis results
+        self.Analyzed = self.SapModel is None
+        self.AnalysisTime = 0.0
+        self.AnalysisRuns = 0
+        if self.Cache is None:
+            self.ensure_analysis()
+        else:
+            self.update_cache_key(True)
+
+        self.StoryDrifts = None
+        self.JointDisplacements = None
+        self.TorsionRatios = None
+
+        # ResultsIndex of story drifts, torsion ratios and drift changes, built when the results are read
+        self.DriftIndex = None
+        self.TorsionIndex = None
+        self.DeltaIndex = None
+
+        # analysis state the story drifts were read under, see analysis_state
+        self.DriftState = None
+
+        # per combo fingerprints of story drifts for incremental re-checks after design changes
+        self.DriftLimit = None
+        self.DriftFingerprints = None
+        self.ChangedCombos = None
+        self.DriftDelta = None
+        self.JointBasis = None
+
+        # torsion ratios computed by the pipeline with the last full read of joint drifts
+        self.PipelineTorsion = None
+        pd.set_option("display.max_columns", 8)
+        # pd.set_option("precision", 4)
+
+    @timed('open model')
+    def open_program(self, sapmodel=None):
+        # start or attach to ETABS and open the model, sapmodel is used instead of ETABS if given
+        if sapmodel is not None:
+            # use the SapModel passed in (e.g. fake_etabs.FakeSapModel), no program is started
+            self.myETABSObject = None
+
+        elif self.Pool is not None:
+            # reuse a started program from the pool, it is given back to the pool when the model is closed
+            with timer_stage(self.Timer, 'start program'):
+                self.myETABSObject = self.Pool.acquire()
+
+        elif self.AttachToInstance:
+            # attach to a running instance of ETABS
+            import comtypes.client  # only needed to start or attach to ETABS
+            try:
+                # get the active ETABS object
+                self.myETABSObject = comtypes.client.GetActiveObject("CSI.ETABS.API.ETABSObject")
+                self.success = True
+            except (OSError, comtypes.COMError):
+                print("No running instance of the program found or failed to attach.")
+                self.success = False
+                sys.exit(-1)
+
+        else:
+            # start a new instance of the program
+            with timer_stage(self.Timer, 'start program'):
+                self.myETABSObject = start_etabs(self.ProgramPath if self.SpecifyPath else None)
+
+        # create SapModel object
+        self.SapModel = sapmodel if sapmodel is not None else self.myETABSObject.SapModel
+        if self.Timer is not None and self.Timer.Enabled:
+            self.SapModel = ComCallCounter(self.SapModel, self.Timer)
+
+        # initialize model
+        self.report("opening model " + self.modelName)
+        openStart = time.perf_counter()
+        with timer_stage(self.Timer, 'open file'):
+            self.SapModel.InitializeNewModel()
+
+            # create new blank model
+            # ret = self.SapModel.File.NewBlank()
+
+            # open existing model
+            ret = self.SapModel.File.OpenFile(self.FullPath)
+        self.OpenTime = time.perf_counter() - openStart
+
+        """
+        # save model
+        print(self.FullPath)
+        ret = self.SapModel.File.Save(self.FullPath)
+        print(ret)
+        print("ETABS mod - model saved")
+        """
+
+    def report(self, message):
+        # pass progress message to the progress function, if one was given
+        if self.Progress is not None:
+            self.Progress(message)
+
+    def has_analysis_results(self):
+        # True if the model is locked and every load case set to run has finished, checked without running analysis
+        if not self.SapModel.GetModelIsLocked():
+            return False
+        [NumberItems, CaseNames, Status, ret] = self.SapModel.Analyze.GetCaseStatus(0, [], [])
+        [NumberItems, RunNames, RunFlags, ret] = self.SapModel.Analyze.GetRunCaseFlag(0, [], [])
+        runCases = set(name for name, run in zip(RunNames, RunFlags) if run)
+        # case status 4 is finished
+        return all(status == 4 for name, status in zip(CaseNames, Status) if name in runCases)
+
+    def ensure_analysis(self):
+        # run analysis unless it was already run, or skipped if checking finds current results
+        if self.Analyzed:
+            return
+        if self.CheckAnalysis and self.has_analysis_results():
+            self.Analyzed = True
+            return
+        self.run_analysis()
+
+    @timed('analysis')
+    def run_analysis(self):
+        # run model (this will create the analysis model)
+        self.report("running analysis")
+        analysisStart = time.perf_counter()
+        ret = self.SapModel.Analyze.RunAnalysis()
+        self.AnalysisTime = time.perf_counter() - analysisStart
+        self.Analyzed = True
+        self.AnalysisRuns += 1
+        self.Backend.refresh()
+        if self.Cache is not None:
+            # analysis saves the model, so results are stored under the key of the saved file
+            self.update_cache_key(True)
+
+    def cached_results(self, kind, extract):
+        # returns results frame from the cache if available, otherwise runs analysis if needed and extracts results
+        if self.Cache is not None:
+            self.update_cache_key()
+            with timer_stage(self.Timer, 'cache load'):
+                df = self.Cache.load(self.CacheKey, kind)
+            if df is not None:
+                return df
+        self.ensure_analysis()
+        df = extract()
+        if self.Cache is not None:
+            with timer_stage(self.Timer, 'cache store'):
+                self.Cache.store(self.CacheKey, kind, df)
+        return df
+
+    def update_cache_key(self, force=False):
+        # key of the model file as it is now, taken again if the analysis state changed since the key was taken,
+        # e.g. when the model was analyzed again in ETABS, so results of the earlier model are not loaded
+        state = self.analysis_state()
+        if force or state != self.CacheState:
+            self.CacheKey = self.Cache.model_key(self.FullPath, self.DriftCombos)
+            self.CacheState = state
+
+    def invalidate_cache(self):
+        # remove cached results of this model so the next results call re-analyzes and re-extracts
+        self.DriftState = None
+        if self.Cache is not None:
+            self.Cache.invalidate(self.CacheKey)
+
+    def analysis_state(self):
+        # cheap key of the results the model holds: analysis runs, lock state and the saved model file,
+        # which analysis rewrites, a change of any of them means results must be read again
+        try:
+            stat = os.stat(self.FullPath)
+            saved = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            saved = None
+        locked = bool(self.SapModel.GetModelIsLocked()) if self.SapModel is not None else True
+        return self.AnalysisRuns, locked, saved
+
+    def store_results(self, kind, df):
+        # store results re-read after design changes under the key of the model file as it is now
+        if self.Cache is not None:
+            self.update_cache_key(True)
+            self.Cache.store(self.CacheKey, kind, df)
+
+    def story_drift_results(self, dlimit=0.01, top=None, per=None, incremental=False, envelope=False):
+        # returns dataframe drift results for all drift load combinations
+        # only the top governing rows (per 'Direction' or 'Story' if given) are returned if top is given
+        # incremental=True re-reads results after design changes and compares them with the previous check
+        # envelope=True returns only the largest drift of each story and direction with its governing combo
+        # dlimit may be a DriftLimits of per story and per combo limits
+        # story drifts read earlier are reused while the analysis state is the same, so a limit change only
+        # recomputes the DCR column
+        if incremental and self.StoryDrifts is not None:
+            self.recheck_story_drifts(dlimit)
+        elif self.StoryDrifts is None or self.DriftState != self.analysis_state():
+            self.StoryDrifts = self.cached_results('story', self.extract_story_drifts)
+            self.DriftFingerprints = combo_fingerprints(self.StoryDrifts)
+            self.DriftIndex = None
+        else:
+            self.report("reusing story drifts of the current analysis")
+        if self.DriftIndex is None:
+            with timer_stage(self.Timer, 'index'):
+                self.DriftIndex = ResultsIndex(self.StoryDrifts)
+        self.DriftState = self.analysis_state()
+        self.DriftLimit = dlimit
+        with timer_stage(self.Timer, 'drift table'):
+            if envelope:
+                return drift_envelope_table(self.StoryDrifts, dlimit, self.DriftIndex)
+            return drift_results_table(self.StoryDrifts, dlimit, top, per)
+
+    def recheck_story_drifts(self, dlimit):
+        # re-read story drifts, find combos whose results changed and build the DCR delta table
+        self.Backend.refresh()  # the model may have been changed in ETABS since the last check
+        self.ensure_analysis()
+        previous = self.StoryDrifts
+        current = self.extract_story_drifts()
+        fingerprints = combo_fingerprints(current)
+        self.ChangedCombos = [dcombo for dcombo in self.DriftCombos
+                              if fingerprints.get(dcombo) != self.DriftFingerprints.get(dcombo)]
+        self.DriftDelta = drift_delta_table(previous, current, self.DriftLimit, dlimit)
+        self.DeltaIndex = ResultsIndex(self.DriftDelta)
+        self.DriftIndex = None
+        self.StoryDrifts = current
+        self.DriftFingerprints = fingerprints
+        self.store_results('story', current)
+
+    @timed('story drifts')
+    def extract_story_drifts(self, combos=None):
+        # returns dataframe of story drifts read from the backend for all drift load combinations, or the combos given
+        combos = self.DriftCombos if combos is None else combos
+        if self.Pipeline is not None:
+            parts = self.Backend.story_drift_parts(self.Pipeline.combo_parts(combos))
+            df = concat_results(self.Pipeline.run(parts, self.story_part) or [self.story_part({})])
+        else:
+            df = results_frame(self.Backend.story_drifts(combos), ['Drift'], self.DriftCombos)
+        if self.Timer is not None:
+            self.Timer.add_rows('story drifts', df['Combo'])
+        return df
+
+    def story_torsion_check(self, top=None, per=None, incremental=False, envelope=False):
+        # returns dataframe of torsion results for drift combinations
+        # only the top governing rows (per 'Direction' or 'Story' if given) are returned if top is given
+        # incremental=True only re-reads joint results of combos whose story drifts changed since the last check
+        # envelope=True returns only the largest ratio of each story and direction with its governing combo
+        if incremental and self.JointDisplacements is not None:
+            self.recheck_joint_drifts()
+        else:
+            self.PipelineTorsion = None
+            self.JointDisplacements = self.cached_results(self.joint_kind(), self.extract_joint_drifts)
+            self.JointBasis = self.joint_basis()
+
+        # calculate torsion ratios for every story and combo, unless the pipeline did while reading joint drifts
+        if self.PipelineTorsion is not None:
+            self.TorsionRatios = self.PipelineTorsion
+        else:
+            with timer_stage(self.Timer, 'torsion table'):
+                self.TorsionRatios = story_torsion_table(self.JointDisplacements)
+        self.PipelineTorsion = None
+        with timer_stage(self.Timer, 'index'):
+            self.TorsionIndex = ResultsIndex(self.TorsionRatios, 'Load Combo')
+        with timer_stage(self.Timer, 'torsion table'):
+            if envelope:
+                return torsion_envelope_table(self.TorsionRatios, self.TorsionIndex)
+            return torsion_results_table(self.TorsionRatios, top, per)
+
+    def recheck_joint_drifts(self):
+        # story drifts are read as a cheap probe of which combos changed, joint drifts of unchanged
+        # combos are kept from the previous check and only the changed combos are read again
+        # every combo is read again if the results have no story drifts to compare
+        self.Backend.refresh()  # the model may have been changed in ETABS since the last check
+        self.ensure_analysis()
+        basis = None
+        if self.Backend.has_story_drifts():
+            basis = combo_fingerprints(self.extract_story_drifts())
+        if basis is None or self.JointBasis is None:
+            changed = list(self.DriftCombos)
+        else:
+            changed = [dcombo for dcombo in self.DriftCombos if basis.get(dcombo) != self.JointBasis.get(dcombo)]
+
+        previous = self.JointDisplacements
+        frames = [previous[~previous['Combo'].isin(changed)]]
+        if changed:
+            frames.append(self.extract_joint_drifts(changed))
+        self.JointDisplacements = concat_results(frames)
+        self.JointBasis = basis
+        self.ChangedCombos = changed
+        self.store_results(self.joint_kind(), self.JointDisplacements)
+
+    def joint_basis(self):
+        # story drift fingerprints of the analysis joint drifts were read from, so the first re-check after a full
+        # check only re-reads changed combos, None if the results have no story drifts, e.g. a joint drifts export
+        # story drifts are read if those of the current analysis are not held, and kept for the next drift check
+        if not self.Backend.has_story_drifts():
+            return None
+        if self.StoryDrifts is None or self.DriftState != self.analysis_state():
+            self.StoryDrifts = self.cached_results('story', self.extract_story_drifts)
+            self.DriftFingerprints = combo_fingerprints(self.StoryDrifts)
+            self.DriftIndex = None
+            self.DriftState = self.analysis_state()
+        return self.DriftFingerprints
+
+    @timed('joint drifts')
+    def extract_joint_drifts(self, combos=None):
+        # returns dataframe of joint displacements read from the backend for all drift load combinations, or the combos given
+        # the pipeline also computes torsion ratios of each part, which are complete as parts hold whole combos
+        allCombos = combos is None
+        combos = self.DriftCombos if combos is None else combos
+        if self.ReduceJoints and self.JointIndex is None:
+            self.build_joint_index()
+        if self.Pipeline is not None:
+            parts = self.Backend.joint_drift_parts(self.Pipeline.combo_parts(combos))
+            frames = self.Pipeline.run(parts, self.joint_part) or [self.joint_part({})]
+            df = concat_results([jdf for jdf, tdf in frames])
+            if allCombos:
+                self.PipelineTorsion = concat_results([tdf for jdf, tdf in frames])
+        else:
+            df = self.joint_frame(self.Backend.joint_drifts(combos))
+        if self.Timer is not None:
+            self.Timer.add_rows('joint drifts', df['Combo'])
+        return df
+
+    def story_part(self, storyArrays):
+        # story drift frame of result arrays read for some of the drift combos
+        storyArrays = storyArrays or {'Story': [], 'Combo': [], 'Direction': [], 'Drift': []}
+        return results_frame(storyArrays, ['Drift'], self.DriftCombos)
+
+    def joint_part(self, jointArrays):
+        # joint displacement frame and torsion ratios of result arrays read for some of the drift combos
+        jointArrays = jointArrays or {'label': [], 'Story': [], 'Combo': [], 'DispX': [], 'DispY': []}
+        jdf = self.joint_frame(jointArrays)
+        return jdf, story_torsion_table(jdf)
+
+    def joint_frame(self, jointArrays):
+        # joint displacement frame of result arrays, only rows of the joints kept by the joint index if there is one
+        if self.JointIndex is not None:
+            jointArrays = self.JointIndex.filter(jointArrays)
+        return results_frame(jointArrays, ['DispX', 'DispY', 'Weight'], self.DriftCombos)
+
+    def joint_kind(self):
+        # cache kind of joint results, reduced joint results are cached apart from full ones
+        return 'joint_reduced' if self.ReduceJoints else 'joint'
+
+    @timed('joint index')
+    def build_joint_index(self):
+        # joint index from the points and diaphragms of the model, joints are not reduced if the backend has no points
+        self.report("indexing joints")
+        points = self.Backend.joint_points()
+        if points is None:
+            self.ReduceJoints = False
+            return
+        self.JointIndex = JointIndex(points)
+
+    def model_close(self):
+        # close the program
+        self.Backend.close()
+        if self.myETABSObject is not None and self.Pool is not None:
+            self.Pool.release(self.myETABSObject)
+        elif self.myETABSObject is not None:
+            ret = self.myETABSObject.ApplicationExit(False)
+        self.SapModel = None
+        self.myETABSObject = None
+        return 'model closed'
+
+"""
+# define drift limit for DCR calc
+DriftLimit = 0.01
+FilePath = "C:\\Users\\Andrew-V.Young\\Desktop\\ETABS API TEST\\ETABS\\TestModel.EDB"
+
+testModel = EtabsModel(FilePath)
+drifts = testModel.story_drift_results(DriftLimit)
+torsion = testModel.story_torsion_check()
+print(drifts.head(10))
+print("\n\n")
+print(torsion)
+
+ret = testModel.model_close()
+print(ret)
+"""
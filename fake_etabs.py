@@ -0,0 +1,352 @@
+# stand-in for the ETABS SapModel COM object so EtabsModel can be run without ETABS
+# results are generated for a simple synthetic building and every API call is counted
+# the same building can be written out as ETABS style Story Drifts and Joint Drifts exports
+import os
+import time
+import zlib
+from collections import Counter
+import numpy as np
+from openpyxl import Workbook
+from etabs_results import EtabsModel
+
+
+class FakeBuilding:
+    # synthetic building with joint displacements for every story and load combination
+    # each story has ndiaphragms rigid diaphragms of njoints joints, side by side in plan
+    # ncombos drift combos are named 'DRIFT 1' ... if no combo names are given
+    def __init__(self, nstories=10, njoints=20, combos=None, storyheight=144.0, seed=0, ndiaphragms=1,
+                 ncombos=None):
+        if combos is None and ncombos is not None:
+            combos = ['DRIFT %d%s' % (i // 4 + 1, ('X+', 'X-', 'Y+', 'Y-')[i % 4]) for i in range(ncombos)]
+        if combos is None:
+            combos = ['DRIFT X+', 'DRIFT X-', 'DRIFT Y+', 'DRIFT Y-', 'DCON1', 'DCON2']
+        self.combos = list(combos)
+        self.cases = ['Dead', 'Live', 'EQX', 'EQY']
+        self.stories = ['Story%d' % (i + 1) for i in range(nstories)]
+        self.storyheight = storyheight
+
+        # joints placed on rectangular floor plates, the same at every story
+        rng = np.random.default_rng(seed)
+        self.diaphragmOf = np.repeat(np.arange(ndiaphragms), njoints)
+        self.jointx = rng.uniform(0.0, 1200.0, njoints * ndiaphragms) + 1400.0 * self.diaphragmOf
+        self.jointy = rng.uniform(0.0, 600.0, njoints * ndiaphragms)
+        self.labels = np.array([str(i + 1) for i in range(njoints * ndiaphragms)])
+
+        # rigid diaphragm displacements (ux, uy, rotation) of each combo and story
+        # displacement grows with height, direction follows the combo name
+        profile = (np.arange(1, nstories + 1) / nstories) ** 1.2
+        self.diaphragm = {}
+        for ci, combo in enumerate(self.combos):
+            sign = -1.0 if combo.endswith('-') else 1.0
+            scale = rng.uniform(0.8, 1.2)
+            ux = 2.0 * scale * sign * profile if 'Y' not in combo.upper() else 0.3 * scale * profile
+            uy = 2.0 * scale * sign * profile if 'Y' in combo.upper() else 0.3 * scale * profile
+            rz = 0.0004 * scale * sign * profile
+            self.diaphragm[combo] = (ux, uy, rz)
+
+    def joint_drifts(self, combo):
+        # joint displacement arrays for one combo, ordered story by story
+        # each diaphragm rotates about its own center
+        ux, uy, rz = self.diaphragm[combo]
+        counts = np.bincount(self.diaphragmOf)
+        xc = self.jointx - (np.bincount(self.diaphragmOf, self.jointx) / counts)[self.diaphragmOf]
+        yc = self.jointy - (np.bincount(self.diaphragmOf, self.jointy) / counts)[self.diaphragmOf]
+        dispx = (ux[:, None] - rz[:, None] * yc[None, :]).ravel()
+        dispy = (uy[:, None] + rz[:, None] * xc[None, :]).ravel()
+        below = np.vstack([np.zeros((1, len(xc))), dispx.reshape(len(self.stories), -1)[:-1]]).ravel()
+        drifx = (dispx - below) / self.storyheight
+        below = np.vstack([np.zeros((1, len(xc))), dispy.reshape(len(self.stories), -1)[:-1]]).ravel()
+        drify = (dispy - below) / self.storyheight
+        stories = np.repeat(self.stories, len(xc))
+        labels = np.tile(self.labels, len(self.stories))
+        return stories, labels, dispx, dispy, drifx, drify
+
+    def points(self):
+        # name, label, story, x, y and diaphragm arrays of every joint, story by story
+        # every diaphragm is rigid and named 'D1', 'D2' ...
+        nstories = len(self.stories)
+        names = np.array([str(i + 1) for i in range(nstories * len(self.labels))])
+        diaphragms = np.array(['D%d' % (d + 1) for d in self.diaphragmOf])
+        return (names, np.tile(self.labels, nstories), np.repeat(self.stories, len(self.labels)),
+                np.tile(self.jointx, nstories), np.tile(self.jointy, nstories), np.tile(diaphragms, nstories))
+
+    def story_drifts(self, combo):
+        # maximum story drift arrays for one combo in X and Y directions
+        stories, labels, dispx, dispy, drifx, drify = self.joint_drifts(combo)
+        nj = len(self.labels)
+        maxx = np.abs(drifx).reshape(-1, nj).max(axis=1)
+        maxy = np.abs(drify).reshape(-1, nj).max(axis=1)
+        return (np.repeat(self.stories, 2), np.tile(['X', 'Y'], len(self.stories)),
+                np.column_stack([maxx, maxy]).ravel())
+
+
+class _FakeApi:
+    # base class that records each call into the owning FakeSapModel
+    def __init__(self, model, prefix):
+        self._model = model
+        self._prefix = prefix
+
+    def _call(self, name):
+        self._model._call(self._prefix + name)
+
+
+class _FakeFile(_FakeApi):
+    def OpenFile(self, path):
+        self._call('OpenFile')
+        self._model.filename = path
+        return 0
+
+
+class _FakeAnalyze(_FakeApi):
+    def RunAnalysis(self):
+        self._call('RunAnalysis')
+        self._model.locked = True
+        return 0
+
+    def GetCaseStatus(self, NumberItems, CaseName, Status):
+        # cases are all finished (4) once analyzed, otherwise not run (1)
+        self._call('GetCaseStatus')
+        cases = self._model.building.cases
+        status = 4 if self._model.locked else 1
+        return [len(cases), list(cases), [status] * len(cases), 0]
+
+    def GetRunCaseFlag(self, NumberItems, CaseName, Run):
+        self._call('GetRunCaseFlag')
+        cases = self._model.building.cases
+        return [len(cases), list(cases), [True] * len(cases), 0]
+
+
+class _FakeRespCombo(_FakeApi):
+    def GetNameList(self, NumberNames, MyName):
+        self._call('GetNameList')
+        combos = self._model.building.combos
+        return [len(combos), list(combos), 0]
+
+
+class _FakeSetup(_FakeApi):
+    def DeselectAllCasesAndCombosForOutput(self):
+        self._call('DeselectAllCasesAndCombosForOutput')
+        self._model.selected = []
+        return 0
+
+    def SetComboSelectedForOutput(self, Name, Selected=True):
+        self._call('SetComboSelectedForOutput')
+        if Name not in self._model.building.combos:
+            return 1
+        if Selected and Name not in self._model.selected:
+            self._model.selected.append(Name)
+        return 0
+
+
+class _FakePointObj(_FakeApi):
+    # points take their diaphragm from the floor area they are on (option 2)
+    def GetAllPoints(self, NumberNames, MyName, X, Y, Z, CSys='Global'):
+        self._call('GetAllPoints')
+        names, labels, stories, x, y, diaphragms = self._model.points
+        return [len(names), names.tolist(), x.tolist(), y.tolist(), [0.0] * len(names), 0]
+
+    def GetLabelFromName(self, Name, Label, Story):
+        self._call('GetLabelFromName')
+        names, labels, stories, x, y, diaphragms = self._model.points
+        i = int(Name) - 1
+        return [str(labels[i]), str(stories[i]), 0]
+
+    def GetDiaphragm(self, Name, DiaphragmOption, DiaphragmName):
+        self._call('GetDiaphragm')
+        return [2, '', 0]
+
+
+class _FakeAreaObj(_FakeApi):
+    # one floor area for each diaphragm at each story, holding all of its points
+    def GetNameList(self, NumberNames, MyName):
+        self._call('GetNameList')
+        names, labels, stories, x, y, diaphragms = self._model.points
+        areas = list(dict.fromkeys('%s/%s' % key for key in zip(stories.tolist(), diaphragms.tolist())))
+        return [len(areas), areas, 0]
+
+    def GetDiaphragm(self, Name, DiaphragmName):
+        self._call('GetDiaphragm')
+        return [Name.split('/')[1], 0]
+
+    def GetPoints(self, Name, NumberPoints, Point):
+        self._call('GetPoints')
+        names, labels, stories, x, y, diaphragms = self._model.points
+        story, diaphragm = Name.split('/')
+        points = names[(stories == story) & (diaphragms == diaphragm)].tolist()
+        return [len(points), points, 0]
+
+
+class _FakeDiaphragm(_FakeApi):
+    def GetNameList(self, NumberNames, MyName):
+        self._call('GetNameList')
+        names = sorted(set(self._model.points[5].tolist()))
+        return [len(names), names, 0]
+
+    def GetDiaphragm(self, Name, SemiRigid):
+        self._call('GetDiaphragm')
+        return [False, 0]
+
+
+class _FakeResults(_FakeApi):
+    def __init__(self, model, prefix):
+        _FakeApi.__init__(self, model, prefix)
+        self.Setup = _FakeSetup(model, prefix + 'Setup.')
+
+    def StoryDrifts(self, NumberResults, Story, LoadCase, StepType, StepNum, Direction, Drift, Label, X, Y, Z):
+        self._call('StoryDrifts')
+        Story, LoadCase, Direction, Drift = [], [], [], []
+        for combo in self._model.selected:
+            stories, directions, drifts = self._model.building.story_drifts(combo)
+            Story += stories.tolist()
+            LoadCase += [combo] * len(stories)
+            Direction += directions.tolist()
+            Drift += drifts.tolist()
+        n = len(Story)
+        return [n, Story, LoadCase, ['Max'] * n, [0.0] * n, Direction, Drift, [''] * n,
+                [0.0] * n, [0.0] * n, [0.0] * n, 0]
+
+    def JointDrifts(self, NumberResults, Story, Label, Name, LoadCase, StepType, StepNum, DispX, DispY, DriftX, DriftY):
+        self._call('JointDrifts')
+        Story, Label, LoadCase, DispX, DispY, DriftX, DriftY = [], [], [], [], [], [], []
+        for combo in self._model.selected:
+            stories, labels, dispx, dispy, drifx, drify = self._model.building.joint_drifts(combo)
+            Story += stories.tolist()
+            Label += labels.tolist()
+            LoadCase += [combo] * len(stories)
+            DispX += dispx.tolist()
+            DispY += dispy.tolist()
+            DriftX += drifx.tolist()
+            DriftY += drify.tolist()
+        n = len(Story)
+        return [n, Story, Label, list(Label), LoadCase, ['Max'] * n, [0.0] * n, DispX, DispY, DriftX, DriftY, 0]
+
+
+class FakeSapModel:
+    # fake SapModel, calls counts every API call by name and latency adds a delay to each call
+    # analyzed=True opens the model as if it was saved with current analysis results
+    def __init__(self, building=None, latency=0.0, analyzed=False):
+        self.building = building if building is not None else FakeBuilding()
+        self.latency = latency
+        self.locked = analyzed
+        self.calls = Counter()
+        self.crashed = False
+        self.selected = []
+        self.filename = ''
+        self.File = _FakeFile(self, 'File.')
+        self.Analyze = _FakeAnalyze(self, 'Analyze.')
+        self.RespCombo = _FakeRespCombo(self, 'RespCombo.')
+        self.Results = _FakeResults(self, 'Results.')
+        self.PointObj = _FakePointObj(self, 'PointObj.')
+        self.AreaObj = _FakeAreaObj(self, 'AreaObj.')
+        self.Diaphragm = _FakeDiaphragm(self, 'Diaphragm.')
+        self.points = self.building.points()
+
+    def _call(self, name):
+        if self.crashed:
+            raise OSError('the remote procedure call failed')
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def InitializeNewModel(self, Units=None):
+        self._call('InitializeNewModel')
+        return 0
+
+    def GetModelIsLocked(self):
+        self._call('GetModelIsLocked')
+        return self.locked
+
+    def GetModelFilename(self, IncludePath=True):
+        self._call('GetModelFilename')
+        return self.filename
+
+    def total_calls(self):
+        # number of API calls made so far
+        return sum(self.calls.values())
+
+
+class FakeModelFactory:
+    # picklable stand-in for EtabsModel in drift_sweep, each model path gets its own synthetic building
+    def __init__(self, nstories=10, njoints=20, latency=0.0):
+        self.nstories = nstories
+        self.njoints = njoints
+        self.latency = latency
+
+    def __call__(self, modelpath):
+        seed = zlib.crc32(os.path.basename(modelpath).encode())
+        building = FakeBuilding(self.nstories, self.njoints, seed=seed)
+        return EtabsModel(modelpath, sapmodel=FakeSapModel(building, latency=self.latency))
+
+
+class FakeEtabsObject:
+    # fake ETABS program object as returned by the API helper, holds a FakeSapModel
+    # crash() makes every later API call fail as if the program had stopped
+    def __init__(self, building=None, latency=0.0, startdelay=0.0):
+        self.SapModel = FakeSapModel(building, latency=latency)
+        self.startdelay = startdelay
+        self.running = False
+
+    def ApplicationStart(self):
+        time.sleep(self.startdelay)
+        self.running = True
+        return 0
+
+    def ApplicationExit(self, FileSave):
+        if self.SapModel.crashed:
+            raise OSError('the remote procedure call failed')
+        self.running = False
+        self.SapModel.crashed = True
+        return 0
+
+    def crash(self):
+        self.running = False
+        self.SapModel.crashed = True
+
+
+class FakeEtabsFactory:
+    # program factory for etabs_pool.EtabsInstancePool, startdelay is the simulated program start time
+    # every program started is kept in programs
+    def __init__(self, building=None, latency=0.0, startdelay=0.0):
+        self.building = building
+        self.latency = latency
+        self.startdelay = startdelay
+        self.programs = []
+
+    def __call__(self):
+        program = FakeEtabsObject(self.building, self.latency, self.startdelay)
+        program.ApplicationStart()
+        self.programs.append(program)
+        return program
+
+
+def write_story_drift_export(path, building, extracombos=('DCON1', 'DCON2')):
+    # Story Drifts table laid out like an ETABS excel export: table title, column titles and units rows
+    # rows of extracombos (not drift combos) are added the way ETABS exports every combo
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet('Story Drifts')
+    sheet.append(['TABLE:  Story Drifts'])
+    sheet.append(['Story', 'Load Case/Combo', 'Direction', 'Drift', 'Label', 'X', 'Y', 'Z'])
+    sheet.append(['', '', '', '', '', 'in', 'in', 'in'])
+    combos = list(building.combos) + [combo for combo in extracombos if combo not in building.combos]
+    for combo in combos:
+        stories, directions, drifts = building.story_drifts(combo if combo in building.diaphragm else building.combos[0])
+        for story, direction, drift in zip(stories.tolist(), directions.tolist(), drifts.tolist()):
+            sheet.append([story, combo, direction, drift, '1', 0.0, 0.0, 0.0])
+    book.save(path)
+    return path
+
+
+def write_joint_drift_export(path, building):
+    # Joint Drifts table laid out like an ETABS csv export, with table title and units rows
+    with open(path, 'w', newline='') as f:
+        f.write('TABLE:  Joint Drifts\n')
+        f.write('Story,Label,Unique Name,Output Case,Case Type,Step Type,Disp X,Disp Y,Drift X,Drift Y\n')
+        f.write(',,,,,,in,in,,\n')
+        for combo in building.combos:
+            stories, labels, dispx, dispy, drifx, drify = building.joint_drifts(combo)
+            rows = np.column_stack([stories, labels, labels, np.full(len(stories), combo),
+                                    np.full(len(stories), 'Combination'), np.full(len(stories), ''),
+                                    dispx.astype(str), dispy.astype(str), drifx.astype(str), drify.astype(str)])
+            f.write('\n'.join(','.join(row) for row in rows.tolist()))
+            f.write('\n')
+    return path
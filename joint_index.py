@@ -0,0 +1,109 @@
+# per story index of the joints needed for the torsion check, built once from the model's points and diaphragms
+# on a rigid diaphragm the in-plane displacement of a joint is an affine function of its plan position,
+# so the largest displacement is at a vertex of the convex hull of the diaphragm's joints and the
+# mean displacement of all its joints is a weighted sum of the hull vertex displacements
+# joint results are filtered when they are read, keeping only hull vertices with their weights
+import numpy as np
+import pandas as pd
+
+
+def convex_hull(x, y):
+    # positions of the convex hull vertices of points x, y (monotone chain), collinear points give the two ends
+    order = np.lexsort((y, x))
+    points = list(zip(x[order].tolist(), y[order].tolist(), order.tolist()))
+
+    def half(points):
+        chain = []
+        for p in points:
+            while len(chain) >= 2 and ((chain[-1][0] - chain[-2][0]) * (p[1] - chain[-2][1]) -
+                                       (chain[-1][1] - chain[-2][1]) * (p[0] - chain[-2][0])) <= 0:
+                chain.pop()
+            chain.append(p)
+        return chain
+
+    lower = half(points)
+    upper = half(reversed(points))
+    hull = lower[:-1] + upper[:-1] or lower
+    return np.array(sorted(set(p[2] for p in hull)), dtype=np.intp)
+
+
+def affine_weights(x, y, vertices):
+    # weights of the vertices whose weighted sum of any affine function of position equals its mean over all points
+    # None if the mean cannot be matched, e.g. from rounding on nearly collinear points
+    a = np.vstack([np.ones(len(vertices)), x[vertices], y[vertices]])
+    b = np.array([1.0, x.mean(), y.mean()])
+    weights = np.linalg.lstsq(a, b, rcond=None)[0]
+    scale = max(1.0, np.abs(b).max())
+    if np.abs(a @ weights - b).max() > 1e-9 * scale:
+        return None
+    return weights
+
+
+class JointIndex:
+    # Weights holds the weight of each model joint keyed by story and label codes, nan for joints left out
+    # joints not on a rigid diaphragm keep weight 1, hull vertices of a rigid diaphragm with n joints
+    # get weights summing to n, so the weighted mean of a story is the mean of all its joints
+    def __init__(self, points):
+        # points holds 'label', 'Story', 'X', 'Y' and 'Diaphragm' arrays of every joint,
+        # 'Diaphragm' is the rigid diaphragm of the joint or '' if it is not on one
+        storyCodes, stories = pd.factorize(np.asarray(points['Story'], dtype=object))
+        labelCodes, labels = pd.factorize(np.asarray(points['label'], dtype=object))
+        diaphragmCodes, diaphragms = pd.factorize(np.asarray(points['Diaphragm'], dtype=object))
+        x = np.asarray(points['X'], dtype=np.float64)
+        y = np.asarray(points['Y'], dtype=np.float64)
+        self.Stories = pd.Index(stories, dtype=object)
+        self.Labels = pd.Index(labels, dtype=object)
+
+        weights = np.ones(len(x))
+        rigid = np.array([name != '' for name in diaphragms], dtype=bool)
+        rigidRows = np.flatnonzero(rigid[diaphragmCodes]) if len(diaphragms) else np.empty(0, dtype=np.intp)
+        groupCodes = storyCodes[rigidRows] * len(diaphragms) + diaphragmCodes[rigidRows]
+        for rows in pd.Series(rigidRows).groupby(groupCodes, sort=False).indices.values():
+            # joints of one rigid diaphragm at one story
+            rows = rigidRows[rows]
+            if len(rows) < 4:
+                continue
+            vertices = convex_hull(x[rows], y[rows])
+            vertexWeights = affine_weights(x[rows], y[rows], vertices)
+            if vertexWeights is None:
+                continue
+            weights[rows] = np.nan
+            weights[rows[vertices]] = len(rows) * vertexWeights
+
+        # sorted story and label keys for vectorized lookups of result rows
+        keys = storyCodes.astype(np.int64) * len(labels) + labelCodes
+        order = np.argsort(keys, kind='stable')
+        self.Keys = keys[order]
+        self.Weights = weights[order]
+
+    def size(self):
+        # number of joints kept out of the number of model joints
+        return int(np.count_nonzero(~np.isnan(self.Weights))), len(self.Weights)
+
+    def weights(self, stories, labels):
+        # weight of each result row, nan for joints left out and 1 for joints not in the index
+        # only the distinct story and label names of the rows are looked up in the index
+        storyCodes, storyNames = pd.factorize(stories)
+        labelCodes, labelNames = pd.factorize(labels)
+        storyCodes = np.append(self.Stories.get_indexer(storyNames), -1)[storyCodes]
+        labelCodes = np.append(self.Labels.get_indexer(labelNames), -1)[labelCodes]
+        keys = storyCodes.astype(np.int64) * len(self.Labels) + labelCodes
+        if not len(self.Keys):
+            return np.ones(len(keys))
+        positions = np.minimum(np.searchsorted(self.Keys, keys), len(self.Keys) - 1)
+        found = (storyCodes >= 0) & (labelCodes >= 0) & (self.Keys[positions] == keys)
+        return np.where(found, self.Weights[positions], 1.0)
+
+    def filter(self, jointArrays):
+        # joint result arrays of the kept joints only, with a 'Weight' column of their weights
+        filtered = {name: [] for name in jointArrays}
+        filtered['Weight'] = []
+        for i in range(len(jointArrays['label'])):
+            columns = {name: np.asarray(parts[i], dtype=np.float64 if name.startswith('Disp') else object)
+                       for name, parts in jointArrays.items()}
+            weights = self.weights(columns['Story'], columns['label'])
+            kept = np.flatnonzero(~np.isnan(weights))
+            for name, values in columns.items():
+                filtered[name].append(values[kept])
+            filtered['Weight'].append(weights[kept])
+        return filtered
@@ -0,0 +1,367 @@
+# sources of drift results for EtabsModel, read from a running ETABS model or from exported tables
+# backends return result arrays per column in the form taken by etabs_results.results_frame
+import csv
+import itertools
+import os
+import pandas as pd
+
+
+def header_key(cell):
+    # column title compared without case or spaces, so 'Disp X' and 'DispX' match
+    return ''.join(str(cell).lower().split()) if cell is not None else ''
+
+
+def match_columns(header, columns):
+    # position of each wanted column in the header row, None if any column is missing
+    # columns maps result column name to the titles it may have in an export
+    keys = [header_key(cell) for cell in header]
+    positions = {}
+    for name, titles in columns.items():
+        for title in titles:
+            if header_key(title) in keys:
+                positions[name] = keys.index(header_key(title))
+                break
+        else:
+            return None
+    return positions
+
+
+def is_units_row(row, positions, floatcolumns):
+    # row of units under the column titles, e.g. 'in' in every displacement column
+    # a table without float columns has no units to tell apart, so its first row is kept as data
+    if not floatcolumns:
+        return False
+    for name in floatcolumns:
+        cell = row[positions[name]] if positions[name] < len(row) else None
+        if cell is None or cell == '':
+            continue
+        try:
+            float(cell)
+        except (TypeError, ValueError):
+            return True
+        return False
+    return True
+
+
+def merge_arrays(parts, columns):
+    # one dict of result arrays of columns from the dicts of arrays read for each part of the combos
+    merged = {name: [] for name in columns}
+    for arrays in parts:
+        for name in columns:
+            merged[name].extend(arrays[name])
+    return merged
+
+
+class ResultsBackend:
+    # base class of result sources, Progress is called with a message at each read
+    # combos passed to story_drifts and joint_drifts are the drift combos to read results for
+    def __init__(self, progress=None):
+        self.Progress = progress
+
+    def report(self, message):
+        if self.Progress is not None:
+            self.Progress(message)
+
+    def combo_names(self):
+        # names of all load combinations in the model
+        raise NotImplementedError
+
+    def story_drifts(self, combos):
+        # dict of 'Story', 'Combo', 'Direction' and 'Drift' lists of arrays
+        raise NotImplementedError
+
+    def joint_drifts(self, combos):
+        # dict of 'label', 'Story', 'Combo', 'DispX' and 'DispY' lists of arrays
+        raise NotImplementedError
+
+    def has_story_drifts(self):
+        # False if the source only holds joint drifts
+        return True
+
+    def joint_points(self):
+        # dict of 'label', 'Story', 'X', 'Y' and 'Diaphragm' arrays of every joint of the model, 'Diaphragm' is
+        # the rigid diaphragm of the joint or '' if it is on none, None if the source has no model geometry
+        return None
+
+    def story_drift_parts(self, comboParts):
+        # story drift arrays of each list of combos in comboParts, read when the next part is asked for
+        # a source that cannot read part of its combos gives every combo in one part
+        yield self.story_drifts([dcombo for combos in comboParts for dcombo in combos])
+
+    def joint_drift_parts(self, comboParts):
+        # joint drift arrays of each list of combos in comboParts, read when the next part is asked for
+        yield self.joint_drifts([dcombo for combos in comboParts for dcombo in combos])
+
+    def refresh(self):
+        # forget anything remembered from earlier reads, called when the model may have changed
+        pass
+
+    def close(self):
+        pass
+
+
+class ComResultsBackend(ResultsBackend):
+    # reads results through the SapModel of an open ETABS model
+    # set batchresults to False to request results one drift combo at a time
+    def __init__(self, sapmodel, batchresults=True, progress=None):
+        ResultsBackend.__init__(self, progress)
+        self.SapModel = sapmodel
+        self.BatchResults = batchresults
+
+    def combo_names(self):
+        # get all load combination names
+        NumberCombo = 0
+        ComboNames = []
+        [NumberCombo, ComboNames, ret] = self.SapModel.RespCombo.GetNameList(NumberCombo, ComboNames)
+        return list(ComboNames)
+
+    def close(self):
+        self.SapModel = None
+
+    def output_combo_sets(self, combos):
+        # groups of drift combos to request together, all drift combos at once in batch mode
+        if self.BatchResults:
+            return [list(combos)]
+        return [[dcombo] for dcombo in combos]
+
+    def select_output_combos(self, combos):
+        # deselect all combos and cases, then only display results for combos passed
+        # done before every results call, as the selection may have been changed in ETABS or by another caller
+        ret = self.SapModel.Results.Setup.DeselectAllCasesAndCombosForOutput()
+        for dcombo in combos:
+            ret = self.SapModel.Results.Setup.SetComboSelectedForOutput(dcombo)
+
+    def joint_points(self):
+        # points with their label and story, diaphragms come from the point or from the floor area it is on
+        [NumberNames, Names, Xs, Ys, Zs, ret] = self.SapModel.PointObj.GetAllPoints(0, [], [], [], [])
+        self.report("reading diaphragms of %d joints" % NumberNames)
+
+        # diaphragms that are rigid, semi-rigid diaphragms do not move joints in an affine way
+        [NumberDiaphragms, DiaphragmNames, ret] = self.SapModel.Diaphragm.GetNameList(0, [])
+        rigid = set()
+        for name in DiaphragmNames:
+            [SemiRigid, ret] = self.SapModel.Diaphragm.GetDiaphragm(name, False)
+            if not SemiRigid:
+                rigid.add(name)
+
+        # diaphragm of the corner points of floor areas with a diaphragm
+        areaDiaphragm = {}
+        [NumberAreas, AreaNames, ret] = self.SapModel.AreaObj.GetNameList(0, [])
+        for area in AreaNames:
+            [DiaphragmName, ret] = self.SapModel.AreaObj.GetDiaphragm(area, '')
+            if DiaphragmName in rigid:
+                [NumberPoints, Points, ret] = self.SapModel.AreaObj.GetPoints(area, 0, [])
+                areaDiaphragm.update(dict.fromkeys(Points, DiaphragmName))
+
+        points = {'label': [], 'Story': [], 'X': list(Xs), 'Y': list(Ys), 'Diaphragm': []}
+        for name in Names:
+            [Label, Story, ret] = self.SapModel.PointObj.GetLabelFromName(name, '', '')
+            # diaphragm option 1 is disconnected, 2 is from the shell object and 3 is a defined diaphragm
+            [DiaphragmOption, DiaphragmName, ret] = self.SapModel.PointObj.GetDiaphragm(name, 0, '')
+            if DiaphragmOption == 2:
+                DiaphragmName = areaDiaphragm.get(name, '')
+            elif DiaphragmOption != 3 or DiaphragmName not in rigid:
+                DiaphragmName = ''
+            points['label'].append(Label)
+            points['Story'].append(Story)
+            points['Diaphragm'].append(DiaphragmName)
+        return points
+
+    def story_drifts(self, combos):
+        return merge_arrays(self.story_drift_parts(self.output_combo_sets(combos)),
+                            ['Story', 'Combo', 'Direction', 'Drift'])
+
+    def story_drift_parts(self, comboSets):
+        for i, combos in enumerate(comboSets):
+            comboText = combos[0] if len(combos) == 1 else "%d drift combos" % len(combos)
+            self.report("reading story drifts for %s (%d of %d)" % (comboText, i + 1, len(comboSets)))
+            self.select_output_combos(combos)
+
+            # initialize drift results
+            NumberResults = 0
+            Stories = []
+            LoadCases = []
+            StepTypes = []
+            StepNums = []
+            Directions = []
+            Drifts = []
+            Labels = []
+            Xs = []
+            Ys = []
+            Zs = []
+
+            [NumberResults, Stories, LoadCases, StepTypes, StepNums, Directions, Drifts, Labels, Xs, Ys, Zs, ret] = \
+                self.SapModel.Results.StoryDrifts(NumberResults, Stories, LoadCases, StepTypes, StepNums, Directions,
+                                                  Drifts, Labels, Xs, Ys, Zs)
+            # keep result arrays for drift columns, combo of each row is given by LoadCases
+            yield {'Story': [Stories], 'Combo': [LoadCases], 'Direction': [Directions], 'Drift': [Drifts]}
+
+    def joint_drifts(self, combos):
+        return merge_arrays(self.joint_drift_parts(self.output_combo_sets(combos)),
+                            ['label', 'Story', 'Combo', 'DispX', 'DispY'])
+
+    def joint_drift_parts(self, comboSets):
+        for i, combos in enumerate(comboSets):
+            comboText = combos[0] if len(combos) == 1 else "%d drift combos" % len(combos)
+            self.report("reading joint drifts for %s (%d of %d)" % (comboText, i + 1, len(comboSets)))
+            self.select_output_combos(combos)
+
+            # initialize joint drift results
+            NumberResults = 0
+            Stories = []
+            LoadCases = []
+            Label  = ''
+            Names = ''
+            StepType = []
+            StepNum = []
+            # Directions = []
+            DispX = []
+            DispY = []
+            DriftX = []
+            DriftY = []
+
+            [NumberResults, Stories, Label, Names, LoadCases, StepType, StepNum, DispX, DispY, DriftX, DriftY, ret] = \
+                self.SapModel.Results.JointDrifts(NumberResults, Stories, Label, Names, LoadCases, StepType, StepNum,
+                                                  DispX, DispY, DriftX, DriftY)
+
+            # keep result arrays for displacement columns, combo of each row is given by LoadCases
+            yield {'label': [Label], 'Story': [Stories], 'Combo': [LoadCases], 'DispX': [DispX], 'DispY': [DispY]}
+
+
+class TableFileBackend(ResultsBackend):
+    # reads the 'Story Drifts' and 'Joint Drifts' tables exported from ETABS, no program is needed
+    # storyfile and jointfile may be .csv/.txt files, .xlsx workbooks or .mdb/.accdb Access databases
+    # the same workbook or database may hold both tables, jointfile defaults to storyfile
+    # tables are read chunksize rows at a time and only rows of the combos asked for are kept
+    storyTable = 'Story Drifts'
+    jointTable = 'Joint Drifts'
+    comboTitles = ['Output Case', 'Load Case/Combo', 'Load Combo', 'Load Case', 'Combo']
+    storyColumns = {'Story': ['Story'], 'Combo': comboTitles, 'Direction': ['Direction'], 'Drift': ['Drift']}
+    jointColumns = {'label': ['Label', 'Joint', 'Point'], 'Story': ['Story'], 'Combo': comboTitles,
+                    'DispX': ['Disp X', 'Ux'], 'DispY': ['Disp Y', 'Uy']}
+    headerRows = 10  # rows searched for the column titles, exports start with a title row
+
+    def __init__(self, storyfile=None, jointfile=None, chunksize=500000, progress=None):
+        ResultsBackend.__init__(self, progress)
+        if storyfile is None and jointfile is None:
+            raise ValueError('no exported tables given')
+        self.StoryFile = storyfile if storyfile is not None else jointfile
+        self.JointFile = jointfile if jointfile is not None else storyfile
+        self.ChunkSize = chunksize
+        self.ComboNames = None
+        self.HasStoryDrifts = None
+
+    def combo_names(self):
+        # names of the combos found in the story drift table, or in the joint drift table if only that is given
+        if self.ComboNames is None:
+            names = {}
+            for chunk in self.read_chunks(self.StoryFile, self.storyTable, {'Combo': self.comboTitles}, []):
+                names.update(dict.fromkeys(pd.unique(chunk['Combo'].dropna())))
+            self.ComboNames = [str(name) for name in names]
+        return self.ComboNames
+
+    def refresh(self):
+        self.ComboNames = None
+        self.HasStoryDrifts = None
+
+    def has_story_drifts(self):
+        # True if the story drift columns are found, an export of joint drifts only has none
+        if self.HasStoryDrifts is None:
+            try:
+                chunks = self.read_chunks(self.StoryFile, self.storyTable, self.storyColumns, ['Drift'])
+                next(chunks, None)
+                chunks.close()
+                self.HasStoryDrifts = True
+            except ValueError:
+                self.HasStoryDrifts = False
+        return self.HasStoryDrifts
+
+    def story_drifts(self, combos):
+        self.report("reading story drifts from " + os.path.basename(self.StoryFile))
+        return self.read_table(self.StoryFile, self.storyTable, self.storyColumns, ['Drift'], combos)
+
+    def joint_drifts(self, combos):
+        self.report("reading joint drifts from " + os.path.basename(self.JointFile))
+        return self.read_table(self.JointFile, self.jointTable, self.jointColumns, ['DispX', 'DispY'], combos)
+
+    def read_table(self, path, table, columns, floatcolumns, combos):
+        # arrays of each column for rows of the combos given
+        arrays = {name: [] for name in columns}
+        combos = list(combos)
+        for chunk in self.read_chunks(path, table, columns, floatcolumns):
+            chunk = chunk[chunk['Combo'].isin(combos)]
+            for name in columns:
+                arrays[name].append(chunk[name].to_numpy())
+        return arrays
+
+    def read_chunks(self, path, table, columns, floatcolumns):
+        # data frames of the wanted columns, named as in columns, by file type
+        extension = os.path.splitext(path)[1].lower()
+        if extension in ('.csv', '.txt'):
+            return self.csv_chunks(path, columns, floatcolumns)
+        if extension in ('.xlsx', '.xlsm'):
+            return self.excel_chunks(path, table, columns, floatcolumns)
+        if extension in ('.mdb', '.accdb'):
+            return self.access_chunks(path, table, columns)
+        raise ValueError('cannot read results tables from ' + path)
+
+    def find_header(self, rows, columns, floatcolumns, path):
+        # (index of the column titles row, column positions, number of units rows after it)
+        for i, row in enumerate(rows):
+            positions = match_columns(row, columns)
+            if positions is None:
+                continue
+            skip = 1 if i + 1 < len(rows) and is_units_row(rows[i + 1], positions, floatcolumns) else 0
+            return i, positions, skip
+        raise ValueError('columns %s not found in %s' % (', '.join(columns), path))
+
+    def csv_chunks(self, path, columns, floatcolumns):
+        # csv is memory mapped and parsed by the pandas C reader, text columns stay strings
+        with open(path, newline='') as f:
+            rows = list(itertools.islice(csv.reader(f), self.headerRows))
+        header, positions, skip = self.find_header(rows, columns, floatcolumns, path)
+        names = {positions[name]: name for name in columns}
+        dtypes = {position: (float if name in floatcolumns else str) for position, name in names.items()}
+        reader = pd.read_csv(path, header=None, skiprows=header + 1 + skip, usecols=list(names),
+                             dtype=dtypes, chunksize=self.ChunkSize, memory_map=True)
+        for chunk in reader:
+            yield chunk.rename(columns=names)
+
+    def excel_chunks(self, path, table, columns, floatcolumns):
+        # rows are streamed from a read only workbook, from the sheet named after the table if there is one
+        from openpyxl import load_workbook
+
+        book = load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheets = {name.lower(): name for name in book.sheetnames}
+            sheet = book[sheets.get(table.lower(), book.sheetnames[0])]
+            rows = sheet.iter_rows(values_only=True)
+            first = list(itertools.islice(rows, self.headerRows))
+            header, positions, skip = self.find_header(first, columns, floatcolumns, path)
+            rows = itertools.chain(first[header + 1 + skip:], rows)
+            chunk = []
+            for row in rows:
+                chunk.append([row[positions[name]] for name in columns])
+                if len(chunk) >= self.ChunkSize:
+                    yield pd.DataFrame(chunk, columns=list(columns))
+                    chunk = []
+            yield pd.DataFrame(chunk, columns=list(columns))
+        finally:
+            book.close()
+
+    def access_chunks(self, path, table, columns):
+        # tables of an Access database export, read through the Access ODBC driver
+        import pyodbc
+
+        connection = pyodbc.connect('DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};DBQ=' + os.path.abspath(path))
+        try:
+            header = [column.column_name for column in connection.cursor().columns(table=table)]
+            positions = match_columns(header, columns)
+            if positions is None:
+                raise ValueError('columns %s not found in table %s of %s' % (', '.join(columns), table, path))
+            query = 'SELECT %s FROM [%s]' % (', '.join('[%s]' % header[positions[name]] for name in columns), table)
+            for chunk in pd.read_sql(query, connection, chunksize=self.ChunkSize):
+                chunk.columns = list(columns)
+                yield chunk
+        finally:
+            connection.close()
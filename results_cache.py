@@ -0,0 +1,95 @@
+# on-disk cache of ETABS drift results so unchanged models are not re-analyzed and re-read
+# entries are keyed by a hash of the model file contents and the list of drift combos
+import hashlib
+import os
+import pickle
+import pandas as pd
+
+
+def file_hash(path, blocksize=1 << 20):
+    # sha1 of file contents, read in blocks so large models are not loaded into memory
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class ResultsCache:
+    # results frames are pickled into cachedir, one file per model key and result kind
+    # least recently used files are removed once the directory grows past maxbytes
+    def __init__(self, cachedir=None, maxbytes=2 * 1024 ** 3):
+        if cachedir is None:
+            cachedir = os.path.join(os.path.expanduser('~'), '.etabs_drift_cache')
+        self.cachedir = cachedir
+        self.maxbytes = maxbytes
+        os.makedirs(self.cachedir, exist_ok=True)
+
+    def model_key(self, modelpath, combos):
+        # key for the current contents of the model file and its drift combos
+        sha = hashlib.sha1(file_hash(modelpath).encode())
+        sha.update('\n'.join(combos).encode())
+        return sha.hexdigest()
+
+    def entry_path(self, key, kind):
+        return os.path.join(self.cachedir, '%s.%s.pkl' % (key, kind))
+
+    def load(self, key, kind):
+        # returns cached frame or None if there is no entry
+        # an entry that cannot be read, e.g. truncated or pickled by other versions of pandas, is removed
+        path = self.entry_path(key, kind)
+        try:
+            df = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError, ImportError):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        os.utime(path)  # mark as recently used
+        return df
+
+    def store(self, key, kind, df):
+        # write to a temporary file first so a partly written entry is never read
+        path = self.entry_path(key, kind)
+        df.to_pickle(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        self.evict()
+
+    def entries(self):
+        # (path, size, last used time) of every cache file
+        entries = []
+        for name in os.listdir(self.cachedir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cachedir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self):
+        # remove least recently used entries until the cache fits in maxbytes
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(entry[1] for entry in entries)
+        for path, size, used in entries:
+            if total <= self.maxbytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def invalidate(self, key=None):
+        # remove all entries of one model key, or the whole cache if no key is given
+        for path, size, used in self.entries():
+            if key is None or os.path.basename(path).startswith(key + '.'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,90 @@
+# writes drift and torsion results to compressed Parquet or Feather files, with an Excel summary of governing rows
+# columnar files share one schema: Model, Story, Combo and Direction columns followed by the result columns
+# pyarrow is only imported by pandas when a columnar file is written
+import pandas as pd
+from etabs_results import drift_sort_column, top_rows
+from stage_timer import timer_stage
+
+COLUMNAR_FORMATS = {'parquet': '.parquet', 'feather': '.feather'}
+
+# summary sheet and governing column of each result table, tables not listed are only written to columnar files
+# envelope and model status tables have no governing column, they are written whole
+SUMMARY_SHEETS = {'drift_envelope': ('drift_envelope', None),
+                  'torsion_envelope': ('torsion_envelope', None),
+                  'drift': ('drift_results', 'Drift'),
+                  'torsion': ('torsion_results', 'Ratio'),
+                  'drift_change': ('drift_change', 'New DCR'),
+                  'models': ('models', None)}
+
+
+def columnar_table(table, modelName):
+    # result table with the common key columns first, torsion 'Load Combo' and joint 'label' are renamed
+    df = table.rename(columns={'Load Combo': 'Combo', 'label': 'Label'}).reset_index(drop=True)
+    if 'Model' not in df.columns:
+        df.insert(0, 'Model', pd.Categorical.from_codes([0] * len(df), [modelName]))
+    key = [column for column in ('Model', 'Story', 'Combo', 'Direction') if column in df.columns]
+    return df[key + [column for column in df.columns if column not in key]]
+
+
+def check_columnar(fmt):
+    # raises ImportError if files of fmt cannot be written, pandas writes parquet and feather files with pyarrow
+    if fmt is None:
+        return
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('writing %s files needs pyarrow, install it or write excel files' % fmt)
+
+
+def write_columnar(table, path, fmt='parquet'):
+    # zstd compressed parquet or feather file without the pandas index
+    if fmt == 'parquet':
+        table.to_parquet(path, compression='zstd', index=False)
+    elif fmt == 'feather':
+        table.to_feather(path, compression='zstd')
+    else:
+        raise ValueError('unknown columnar format ' + str(fmt))
+
+
+def summary_table(table, column, rows=50):
+    # governing rows of a result table, the top rows of each model and direction if the table has those columns
+    # drift rows with limits of their own are ranked by DCR
+    if column == 'Drift':
+        column = drift_sort_column(table)
+    per = [name for name in ('Model', 'Direction') if name in table.columns] or None
+    return top_rows(table, column, rows, per)
+
+
+def export_results(basepath, modelName, tables, fmt='parquet', summary=True, summaryrows=50, timer=None):
+    # tables maps table name (e.g. 'drift') to result frame, empty and None tables are skipped
+    # each table is written to '<basepath>_<name>.parquet' (or .feather) and the summary workbook '<basepath>.xlsx'
+    # gets the governing rows of the tables in SUMMARY_SHEETS
+    # if fmt is None there are no columnar files and the workbook gets every row of those tables instead
+    # returns the paths written
+    tables = {name: table for name, table in tables.items() if table is not None and not table.empty}
+    check_columnar(fmt)
+    paths = []
+    if fmt is not None:
+        for name, table in tables.items():
+            path = '%s_%s%s' % (basepath, name, COLUMNAR_FORMATS[fmt])
+            with timer_stage(timer, 'write ' + name):
+                write_columnar(columnar_table(table, modelName), path, fmt)
+            paths.append(path)
+
+    sheets = [name for name in SUMMARY_SHEETS if name in tables]
+    if fmt is None and sheets:
+        # the workbook is the only output, as saved before columnar files were written
+        path = basepath + '.xlsx'
+        with timer_stage(timer, 'write excel'), pd.ExcelWriter(path) as writer:
+            for name in sheets:
+                tables[name].to_excel(writer, sheet_name=SUMMARY_SHEETS[name][0])
+        paths.append(path)
+    elif summary and sheets:
+        path = basepath + '.xlsx'
+        with timer_stage(timer, 'write excel summary'), pd.ExcelWriter(path) as writer:
+            for name in sheets:
+                sheetName, column = SUMMARY_SHEETS[name]
+                table = tables[name] if column is None else summary_table(tables[name], column, summaryrows)
+                table.to_excel(writer, sheet_name=sheetName)
+        paths.append(path)
+    return paths
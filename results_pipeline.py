@@ -0,0 +1,59 @@
+# overlaps reading results from ETABS with converting them, through a bounded queue
+# the thread that owns the SapModel (COM initialized on it) reads one part of the drift combos at a time,
+# worker threads turn each part into frames and torsion ratios while the next part is read
+import queue
+import threading
+
+_STOP = object()
+
+
+class ResultsPipeline:
+    # depth is the number of parts read but not yet converted that may wait in the queue,
+    # so result arrays held in memory are bounded by about depth + workers parts
+    # combos is the number of drift combos read with each results call
+    def __init__(self, depth=2, workers=1, combos=1):
+        self.Depth = depth
+        self.Workers = workers
+        self.Combos = combos
+
+    def combo_parts(self, combos):
+        # drift combos split into the parts read one at a time
+        combos = list(combos)
+        return [combos[i:i + self.Combos] for i in range(0, len(combos), self.Combos)]
+
+    def run(self, parts, convert):
+        # calls convert on worker threads for each item of parts, which is iterated on this thread
+        # returns converted items in the order they were read, errors of either side are raised here
+        work = queue.Queue(maxsize=self.Depth)
+        results = {}
+        errors = []
+
+        def consume():
+            while True:
+                item = work.get()
+                if item is _STOP:
+                    return
+                i, part = item
+                if errors:
+                    continue  # drain the queue once something failed
+                try:
+                    results[i] = convert(part)
+                except BaseException as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=consume, daemon=True) for i in range(self.Workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for i, part in enumerate(parts):
+                work.put((i, part))
+                if errors:
+                    break
+        finally:
+            for thread in threads:
+                work.put(_STOP)
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+        return [results[i] for i in sorted(results)]
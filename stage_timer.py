@@ -0,0 +1,134 @@
+# timing of each stage of the drift and torsion checks and of drift table reformatting, reported as JSON
+# a stage is timed with "with timer_stage(timer, name):" or by decorating a method with @timed(name)
+# when no timer is given, or it is disabled, a stage costs one check and no clock reads
+import functools
+import json
+import time
+from collections import Counter, OrderedDict
+
+
+class _NullStage:
+    # context manager used when timing is off
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer.Stages.setdefault(self.name, {'calls': 0, 'seconds': 0.0})  # keeps stages in order started
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimer:
+    # Stages holds calls and total seconds of each stage name in order first started, stages may be nested
+    # ComCalls holds calls and seconds of each API function called through a ComCallCounter
+    # Rows holds result rows per combo of each extraction kind
+    def __init__(self, enabled=True):
+        self.Enabled = enabled
+        self.clear()
+
+    def clear(self):
+        self.Stages = OrderedDict()
+        self.ComCalls = OrderedDict()
+        self.Rows = OrderedDict()
+        self.Started = time.perf_counter()
+
+    def stage(self, name):
+        # context manager timing the code run inside it
+        if not self.Enabled:
+            return NULL_STAGE
+        return _Stage(self, name)
+
+    def add_time(self, name, seconds, stages=None):
+        stages = self.Stages if stages is None else stages
+        entry = stages.get(name)
+        if entry is None:
+            entry = stages[name] = {'calls': 0, 'seconds': 0.0}
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+
+    def add_com_call(self, name, seconds):
+        self.add_time(name, seconds, self.ComCalls)
+
+    def add_rows(self, kind, combos):
+        # count rows of each combo in a results column of combo names
+        if not self.Enabled:
+            return
+        counts = self.Rows.setdefault(kind, Counter())
+        counts.update({str(combo): int(n) for combo, n in combos.value_counts(sort=False).items() if n})
+
+    def report(self):
+        # timing report as a dict of plain values
+        return {'total_seconds': round(time.perf_counter() - self.Started, 6),
+                'stages': {name: {'calls': entry['calls'], 'seconds': round(entry['seconds'], 6)}
+                           for name, entry in self.Stages.items()},
+                'com_calls': {name: {'calls': entry['calls'], 'seconds': round(entry['seconds'], 6)}
+                              for name, entry in self.ComCalls.items()},
+                'rows': {kind: dict(counts) for kind, counts in self.Rows.items()}}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.report(), indent=indent)
+
+
+def timer_stage(timer, name):
+    # stage of timer, or a context manager doing nothing if there is no timer
+    if timer is None or not timer.Enabled:
+        return NULL_STAGE
+    return _Stage(timer, name)
+
+
+def timed(name):
+    # method decorator timing each call as stage name of the object's Timer attribute
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            timer = self.Timer
+            if timer is None or not timer.Enabled:
+                return method(self, *args, **kwargs)
+            with _Stage(timer, name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class ComCallCounter:
+    # wraps a SapModel (or one of its API objects) and records each function called through it
+    # e.g. SapModel.Results.StoryDrifts(...) is recorded as 'Results.StoryDrifts'
+    def __init__(self, target, timer, prefix=''):
+        self._target = target
+        self._timer = timer
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        fullName = self._prefix + name
+        if isinstance(value, (bool, int, float, str, bytes, type(None))):
+            return value
+        if not callable(value):
+            return ComCallCounter(value, self._timer, fullName + '.')
+        timer = self._timer
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                timer.add_com_call(fullName, time.perf_counter() - start)
+        return call
@@ -0,0 +1,29 @@
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, FakeSapModel
+
+
+def open_model(tmp_path, analyzed, checkanalysis):
+    sapmodel = FakeSapModel(FakeBuilding(nstories=4, njoints=6), analyzed=analyzed)
+    return EtabsModel(str(tmp_path / 'Model.EDB'), sapmodel=sapmodel, checkanalysis=checkanalysis), sapmodel
+
+
+def test_analysis_skipped_when_model_has_results(tmp_path):
+    model, sapmodel = open_model(tmp_path, analyzed=True, checkanalysis=True)
+    model.story_drift_results(0.01)
+    assert sapmodel.calls['Analyze.RunAnalysis'] == 0
+    assert sapmodel.calls['Analyze.GetCaseStatus'] == 1
+
+
+def test_analysis_run_when_model_has_no_results(tmp_path):
+    model, sapmodel = open_model(tmp_path, analyzed=False, checkanalysis=True)
+    model.story_drift_results(0.01)
+    assert sapmodel.calls['Analyze.RunAnalysis'] == 1
+    assert model.AnalysisRuns == 1
+
+
+def test_analysis_always_run_without_check(tmp_path):
+    model, sapmodel = open_model(tmp_path, analyzed=True, checkanalysis=False)
+    model.story_drift_results(0.01)
+    model.story_torsion_check()
+    assert sapmodel.calls['Analyze.RunAnalysis'] == 1
+    assert sapmodel.calls['Analyze.GetCaseStatus'] == 0
@@ -0,0 +1,9 @@
+import pytest
+from drift_cli import main
+
+
+@pytest.mark.parametrize('argv', [['--top', '0'], ['--top', '-5'], ['--per', 'Story']])
+def test_top_and_per_arguments_are_checked(argv, capsys):
+    with pytest.raises(SystemExit):
+        main(['drift', 'Model.EDB'] + argv)
+    assert '--top' in capsys.readouterr().err
@@ -0,0 +1,43 @@
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, FakeSapModel
+
+
+def run_checks(tmp_path, building, batchresults):
+    sapmodel = FakeSapModel(building)
+    model = EtabsModel(str(tmp_path / 'Model.EDB'), batchresults=batchresults, sapmodel=sapmodel)
+    sapmodel.calls.clear()
+    drifts = model.story_drift_results(0.01)
+    torsion = model.story_torsion_check()
+    return sapmodel, drifts, torsion
+
+
+def sorted_rows(df):
+    key = list(df.columns[:3])
+    return df.sort_values(key).reset_index(drop=True)
+
+
+def test_batch_results_read_each_result_type_once(tmp_path):
+    building = FakeBuilding(nstories=6, njoints=8, combos=['DRIFT %d' % (i + 1) for i in range(12)])
+    batch, batchDrifts, batchTorsion = run_checks(tmp_path, building, True)
+    single, singleDrifts, singleTorsion = run_checks(tmp_path, building, False)
+
+    assert batch.calls['Results.StoryDrifts'] == 1
+    assert batch.calls['Results.JointDrifts'] == 1
+    assert single.calls['Results.StoryDrifts'] == 12
+    assert single.calls['Results.JointDrifts'] == 12
+    assert batch.total_calls() < single.total_calls() / 2
+    assert sorted_rows(batchDrifts).equals(sorted_rows(singleDrifts))
+    assert sorted_rows(batchTorsion).equals(sorted_rows(singleTorsion))
+
+
+def test_output_selection_is_set_before_each_read(tmp_path):
+    building = FakeBuilding(nstories=4, njoints=6)
+    sapmodel = FakeSapModel(building)
+    model = EtabsModel(str(tmp_path / 'Model.EDB'), sapmodel=sapmodel)
+    torsion = model.story_torsion_check()
+    # a selection changed in ETABS between checks does not change the combos read
+    sapmodel.selected = ['DCON1']
+    sapmodel.calls.clear()
+    again = model.story_torsion_check()
+    assert sapmodel.calls['Results.Setup.DeselectAllCasesAndCombosForOutput'] == 1
+    assert set(again['Load Combo']) == set(torsion['Load Combo'])
@@ -0,0 +1,41 @@
+import sys
+import pandas as pd
+import pytest
+from etabs_results import DriftLimits, EtabsModel
+from fake_etabs import FakeBuilding, FakeSapModel
+from results_export import export_results
+
+
+def test_summary_ranks_drifts_by_dcr_with_story_limits(tmp_path):
+    building = FakeBuilding(nstories=10, njoints=8)
+    model = EtabsModel(str(tmp_path / 'Model.EDB'), sapmodel=FakeSapModel(building, analyzed=True),
+                       checkanalysis=True)
+    # a low story has small drifts but the tightest limit, so it governs by DCR
+    dlimit = DriftLimits(0.01, {'Story2': 0.0005})
+    drifts = model.story_drift_results(dlimit)
+    export_results(str(tmp_path / 'results'), model.modelName, {'drift': drifts}, 'parquet', summaryrows=5)
+
+    summary = pd.read_excel(tmp_path / 'results.xlsx', sheet_name='drift_results', index_col=0)
+    assert summary['DCR(Drift/Limit)'].max() == drifts['DCR(Drift/Limit)'].max()
+    assert (summary['Story'] == 'Story2').any()
+
+
+def test_excel_only_export_writes_every_row(tmp_path):
+    model = EtabsModel(str(tmp_path / 'Model.EDB'), sapmodel=FakeSapModel(FakeBuilding(), analyzed=True),
+                       checkanalysis=True)
+    tables = {'drift': model.story_drift_results(0.01), 'torsion': model.story_torsion_check(),
+              'joint_displacements': model.JointDisplacements}
+    paths = export_results(str(tmp_path / 'results'), model.modelName, tables, None, summary=False, summaryrows=5)
+
+    assert paths == [str(tmp_path / 'results.xlsx')]
+    sheets = pd.read_excel(paths[0], sheet_name=None, index_col=0)
+    assert list(sheets) == ['drift_results', 'torsion_results']
+    assert len(sheets['drift_results']) == len(tables['drift'])
+    assert len(sheets['torsion_results']) == len(tables['torsion'])
+
+
+def test_columnar_export_without_pyarrow_fails_before_writing(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    with pytest.raises(ImportError):
+        export_results(str(tmp_path / 'results'), '', {'drift': pd.DataFrame({'Drift': [0.01]})}, 'parquet')
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,32 @@
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, write_joint_drift_export, write_story_drift_export
+from results_backends import TableFileBackend
+
+
+def test_torsion_check_of_joint_drifts_export_only(tmp_path):
+    building = FakeBuilding(nstories=4, njoints=6)
+    jointFile = write_joint_drift_export(str(tmp_path / 'JointDrifts.csv'), building)
+    model = EtabsModel(jointFile, backend=TableFileBackend(jointfile=jointFile))
+    torsion = model.story_torsion_check()
+    # one row of each story and drift combo
+    assert len(torsion) == 4 * len([combo for combo in building.combos if 'DRIFT' in combo])
+    assert model.JointBasis is None
+
+
+def test_torsion_recheck_of_joint_drifts_export_reads_every_combo(tmp_path):
+    jointFile = write_joint_drift_export(str(tmp_path / 'JointDrifts.csv'), FakeBuilding(nstories=4, njoints=6))
+    model = EtabsModel(jointFile, backend=TableFileBackend(jointfile=jointFile))
+    full = model.story_torsion_check()
+    again = model.story_torsion_check(incremental=True)
+    assert model.ChangedCombos == model.DriftCombos
+    assert len(again) == len(full)
+
+
+def test_torsion_check_of_story_and_joint_exports_keeps_basis(tmp_path):
+    building = FakeBuilding(nstories=4, njoints=6)
+    storyFile = write_story_drift_export(str(tmp_path / 'StoryDrifts.xlsx'), building)
+    jointFile = write_joint_drift_export(str(tmp_path / 'JointDrifts.csv'), building)
+    model = EtabsModel(storyFile, backend=TableFileBackend(storyFile, jointFile))
+    model.story_torsion_check()
+    model.story_torsion_check(incremental=True)
+    assert model.ChangedCombos == []
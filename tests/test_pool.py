@@ -0,0 +1,90 @@
+import pytest
+from etabs_pool import EtabsInstancePool, PoolExhausted
+from etabs_results import EtabsModel
+from fake_etabs import FakeEtabsFactory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_release_and_acquire_reuses_program():
+    factory = FakeEtabsFactory()
+    pool = EtabsInstancePool(factory, maxsize=1)
+    program = pool.acquire()
+    pool.release(program)
+    assert pool.acquire() is program
+    assert (pool.Started, pool.Reused) == (1, 1)
+    assert len(factory.programs) == 1
+
+
+def test_models_opened_in_turn_share_one_program(tmp_path):
+    factory = FakeEtabsFactory()
+    pool = EtabsInstancePool(factory, maxsize=1)
+    for name in ('A.EDB', 'B.EDB', 'C.EDB'):
+        model = EtabsModel(str(tmp_path / name), pool=pool)
+        model.story_drift_results(0.01)
+        model.model_close()
+    assert (pool.Started, pool.Reused) == (1, 2)
+    program = factory.programs[0]
+    assert program.running
+    assert program.SapModel.calls['File.OpenFile'] == 3
+    assert program.SapModel.calls['Analyze.RunAnalysis'] == 3
+
+
+def test_acquire_past_maxsize_raises():
+    pool = EtabsInstancePool(FakeEtabsFactory(), maxsize=1)
+    pool.acquire()
+    with pytest.raises(PoolExhausted):
+        pool.acquire()
+
+
+def test_idle_programs_are_evicted_after_timeout():
+    clock = FakeClock()
+    factory = FakeEtabsFactory()
+    pool = EtabsInstancePool(factory, maxsize=2, idletimeout=60.0, clock=clock)
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    clock.now = 50.0
+    pool.release(second)
+    clock.now = 100.0
+    assert pool.evict_idle() == 1
+    assert not first.running and second.running
+    assert pool.acquire() is second
+    assert pool.Started == 2
+
+
+def test_crashed_program_is_replaced():
+    factory = FakeEtabsFactory()
+    pool = EtabsInstancePool(factory, maxsize=1)
+    program = pool.acquire()
+    pool.release(program)
+    program.crash()
+    replacement = pool.acquire()
+    assert replacement is not program
+    assert pool.Started == 2 and pool.Reused == 0
+    assert pool.size() == 1
+
+
+def test_program_crashed_while_in_use_is_not_kept():
+    pool = EtabsInstancePool(FakeEtabsFactory(), maxsize=1)
+    program = pool.acquire()
+    program.crash()
+    pool.release(program)
+    assert pool.size() == 0
+
+
+def test_close_exits_idle_and_busy_programs():
+    factory = FakeEtabsFactory()
+    pool = EtabsInstancePool(factory, maxsize=2)
+    idle = pool.acquire()
+    busy = pool.acquire()
+    pool.release(idle)
+    pool.close()
+    assert pool.size() == 0
+    assert not idle.running and not busy.running
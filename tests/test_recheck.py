@@ -0,0 +1,42 @@
+from etabs_results import EtabsModel
+from fake_etabs import FakeBuilding, FakeSapModel
+
+
+def open_model(tmp_path, building):
+    sapmodel = FakeSapModel(building, analyzed=True)
+    model = EtabsModel(str(tmp_path / 'Model.EDB'), sapmodel=sapmodel, checkanalysis=True, batchresults=False)
+    return model, sapmodel
+
+
+def change_combo(building, combo, factor=1.1):
+    ux, uy, rz = building.diaphragm[combo]
+    building.diaphragm[combo] = (ux * factor, uy, rz)
+
+
+def test_first_torsion_recheck_only_reads_changed_combos(tmp_path):
+    building = FakeBuilding(nstories=5, njoints=10)
+    model, sapmodel = open_model(tmp_path, building)
+    model.story_torsion_check()
+    change_combo(building, 'DRIFT X+')
+    before = sapmodel.calls['Results.JointDrifts']
+    model.story_torsion_check(incremental=True)
+    assert model.ChangedCombos == ['DRIFT X+']
+    assert sapmodel.calls['Results.JointDrifts'] - before == 1
+
+
+def test_story_drifts_read_for_torsion_basis_are_reused(tmp_path):
+    model, sapmodel = open_model(tmp_path, FakeBuilding(nstories=5, njoints=10))
+    model.story_torsion_check()
+    reads = sapmodel.calls['Results.StoryDrifts']
+    model.story_drift_results(0.01)
+    assert sapmodel.calls['Results.StoryDrifts'] == reads
+
+
+def test_drift_recheck_reports_changed_combos(tmp_path):
+    building = FakeBuilding(nstories=5, njoints=10)
+    model, sapmodel = open_model(tmp_path, building)
+    model.story_drift_results(0.01)
+    change_combo(building, 'DRIFT Y-', 1.5)
+    model.story_drift_results(0.01, incremental=True)
+    assert model.ChangedCombos == ['DRIFT Y-']
+    assert set(model.DriftDelta['Combo']) >= {'DRIFT Y-'}
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from drift_reformat import reformat_drift_table, write_sorted_sheets
+from fake_etabs import FakeBuilding, write_story_drift_export
+
+
+def test_sorted_sheet_with_infinite_and_missing_values(tmp_path):
+    path = write_story_drift_export(str(tmp_path / 'StoryDrifts.xlsx'), FakeBuilding(nstories=3))
+    table = pd.DataFrame({'Story': ['Story3', 'Story2', 'Story1', None],
+                          'Ratio': [np.inf, -np.inf, np.nan, 1.25], 'Count': [1, 2, 3, 4]})
+    write_sorted_sheets(path, {'Drift Sorted': table})
+
+    book = load_workbook(path)
+    assert book.sheetnames == ['Story Drifts', 'Drift Sorted']
+    sheet = book['Drift Sorted']
+    assert [cell.value for cell in sheet[1]] == [None, 'Story', 'Ratio', 'Count']
+    assert [cell.value for cell in sheet['C'][1:]] == [None, None, None, 1.25]
+    result = pd.read_excel(path, sheet_name='Drift Sorted', index_col=0)
+    assert result['Ratio'].isna().tolist() == [True, True, True, False]
+    assert result['Count'].tolist() == [1, 2, 3, 4]
+    assert result['Story'].tolist()[:3] == ['Story3', 'Story2', 'Story1']
+
+
+def test_reformat_again_replaces_sorted_sheet(tmp_path):
+    path = write_story_drift_export(str(tmp_path / 'StoryDrifts.xlsx'), FakeBuilding(nstories=3))
+    reformat_drift_table(path)
+    first = pd.read_excel(path, sheet_name='Drift Sorted', index_col=0)
+    reformat_drift_table(path)
+    assert load_workbook(path).sheetnames == ['Story Drifts', 'Drift Sorted']
+    pd.testing.assert_frame_equal(pd.read_excel(path, sheet_name='Drift Sorted', index_col=0), first)
+    assert len(pd.read_excel(path, sheet_name='Story Drifts', header=1)) > len(first)
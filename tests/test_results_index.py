@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from etabs_results import ResultsIndex, drift_envelope_table, results_frame, torsion_envelope_table
+from fake_etabs import FakeBuilding
+
+
+def story_drifts(building):
+    arrays = {'Story': [], 'Combo': [], 'Direction': [], 'Drift': []}
+    for combo in building.combos:
+        stories, directions, drifts = building.story_drifts(combo)
+        arrays['Story'].append(stories)
+        arrays['Combo'].append(np.full(len(stories), combo))
+        arrays['Direction'].append(directions)
+        arrays['Drift'].append(drifts)
+    return results_frame(arrays, ['Drift'], building.combos)
+
+
+def test_rows_match_filtering_the_frame():
+    df = story_drifts(FakeBuilding(nstories=6))
+    index = ResultsIndex(df)
+    assert index.labels('Direction') == ['X', 'Y']
+    expected = np.flatnonzero(((df['Story'] == 'Story3') & (df['Direction'] == 'Y')).to_numpy())
+    assert index.rows('Story3', direction='Y').tolist() == expected.tolist()
+    cell = index.rows('Story3', 'DRIFT X+', 'X')
+    assert len(cell) == 1 and df.iloc[cell[0]]['Combo'] == 'DRIFT X+'
+    assert len(index.rows('Story99')) == 0
+    assert len(index.rows()) == len(df)
+
+
+def test_governing_rows_of_each_group():
+    df = story_drifts(FakeBuilding(nstories=6))
+    df.loc[3, 'Drift'] = np.nan
+    index = ResultsIndex(df)
+    rows = index.governing(df['Drift'].to_numpy(), ['Story', 'Direction'])
+    expected = df.groupby(['Story', 'Direction'], observed=True)['Drift'].idxmax()
+    assert sorted(rows.tolist()) == sorted(expected.tolist())
+    assert sorted(index.governing(df['Drift'].to_numpy(), 'Combo').tolist()) == \
+        sorted(df.groupby('Combo', observed=True)['Drift'].idxmax().tolist())
+
+
+def test_envelope_tables_use_the_index_given():
+    df = story_drifts(FakeBuilding(nstories=6))
+    index = ResultsIndex(df)
+    envelope = drift_envelope_table(df, 0.01, index)
+    assert len(envelope) == 12
+    pd.testing.assert_frame_equal(envelope, drift_envelope_table(df, 0.01))
+    torsion = pd.DataFrame({'Story': ['S1', 'S1', 'S2'], 'Load Combo': ['A', 'B', 'A'], 'Direction': 'X',
+                            'Max Displ': 1.0, 'Avg Displ': 1.0, 'Ratio': [1.1, 1.3, 1.2]})
+    assert torsion_envelope_table(torsion)['Load Combo'].tolist() == ['B', 'A']
@@ -0,0 +1,77 @@
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from drift_cli import drift_limit, limit_argument
+from drift_sweep import sweep_models
+from etabs_results import DriftLimits
+from fake_etabs import FakeModelFactory
+
+
+def make_models(tmp_path, names):
+    for name in names:
+        (tmp_path / name).touch()
+    return str(tmp_path)
+
+
+def test_sweep_with_story_limits(tmp_path):
+    args = argparse.Namespace(limit=0.01, story_limit=[limit_argument('Story10=0.002, Story9=0.003')], combo_limit=[])
+    dlimit = drift_limit(args)
+    assert isinstance(dlimit, DriftLimits)
+    models = make_models(tmp_path, ['A.EDB', 'B.EDB'])
+    driftTable, torsTable, statusTable = sweep_models(models, str(tmp_path / 'sweep.xlsx'), dlimit, 2,
+                                                      FakeModelFactory(), fmt='parquet')
+    assert list(statusTable['Status']) == ['checked', 'checked']
+    assert set(driftTable['Model']) == {'A.EDB', 'B.EDB'}
+    roof = driftTable[driftTable['Story'] == 'Story10']
+    assert (roof['Drift Limit'] == 0.002).all()
+    assert (driftTable.loc[driftTable['Story'] == 'Story1', 'Drift Limit'] == 0.01).all()
+    assert driftTable['DCR(Drift/Limit)'].is_monotonic_decreasing
+
+    envelope = pd.read_parquet(tmp_path / 'sweep_drift_envelope.parquet')
+    assert list(envelope.columns).count('Drift Limit') == 1
+    assert len(envelope) == len(driftTable.groupby(['Model', 'Story', 'Direction']))
+    # the governing DCR of each model, story and direction matches the full drift table
+    governing = driftTable.groupby(['Model', 'Story', 'Direction'])['DCR(Drift/Limit)'].max()
+    envelopeDcr = envelope.set_index(['Model', 'Story', 'Direction'])['DCR(Drift/Limit)']
+    assert np.allclose(envelopeDcr.sort_index(), governing.sort_index())
+
+
+def test_sweep_keeps_model_order(tmp_path):
+    models = make_models(tmp_path, ['C.EDB', 'A.EDB', 'B.EDB'])
+    driftTable, torsTable, statusTable = sweep_models(models, str(tmp_path / 'sweep.xlsx'), 0.01, 2,
+                                                      FakeModelFactory(), fmt=None)
+    assert list(statusTable['Model']) == ['A.EDB', 'B.EDB', 'C.EDB']
+    sheets = pd.read_excel(tmp_path / 'sweep.xlsx', sheet_name=None)
+    assert list(sheets['models']['Model']) == ['A.EDB', 'B.EDB', 'C.EDB']
+    assert driftTable['Drift'].is_monotonic_decreasing
+
+
+class FailingModelFactory(FakeModelFactory):
+    # fake models where B.EDB cannot be opened and C.EDB exits as when ETABS cannot be started
+    def __call__(self, modelpath):
+        if modelpath.endswith('B.EDB'):
+            raise OSError('cannot open model')
+        if modelpath.endswith('C.EDB'):
+            raise SystemExit(-1)
+        return FakeModelFactory.__call__(self, modelpath)
+
+
+def test_sweep_continues_past_failed_models(tmp_path):
+    models = make_models(tmp_path, ['A.EDB', 'B.EDB', 'C.EDB', 'D.EDB'])
+    driftTable, torsTable, statusTable = sweep_models(models, str(tmp_path / 'sweep.xlsx'), 0.01, 2,
+                                                      FailingModelFactory(), fmt='parquet')
+    assert list(statusTable['Status']) == ['checked', 'failed: cannot open model', 'failed: -1', 'checked']
+    assert set(driftTable['Model']) == {'A.EDB', 'D.EDB'}
+    assert set(torsTable['Model']) == {'A.EDB', 'D.EDB'}
+    sheets = pd.read_excel(tmp_path / 'sweep.xlsx', sheet_name=None)
+    assert set(sheets['drift_envelope']['Model']) == {'A.EDB', 'D.EDB'}
+    assert list(sheets['models']['Status']) == list(statusTable['Status'])
+
+
+def test_sweep_without_pyarrow_fails_before_checking_models(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    models = make_models(tmp_path, ['A.EDB'])
+    with pytest.raises(ImportError):
+        sweep_models(models, str(tmp_path / 'sweep.xlsx'), 0.01, 1, FakeModelFactory(), fmt='parquet')